@@ -0,0 +1,198 @@
+# artifact_store.py
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils import get_env, logger, ensure_dir
+
+# Dedicated directory: retention deletes any .pptx in it.
+ARTIFACT_STORE_DIR = get_env("ARTIFACT_STORE_DIR", os.path.join("generated", "artifacts"))
+ARTIFACT_STORE_MAX_BYTES = int(get_env("ARTIFACT_STORE_MAX_BYTES", 2 * 1024 * 1024 * 1024))
+ARTIFACT_STORE_MAX_AGE_SECONDS = int(get_env("ARTIFACT_STORE_MAX_AGE_SECONDS", 30 * 24 * 3600))
+# Upload new artifacts to the generated-presentations container in the background.
+ARTIFACT_MIRROR = get_env("ARTIFACT_MIRROR", "true").lower() in ("1", "true", "yes")
+
+# Bump when generator output changes so older artifacts are not served.
+ARTIFACT_FORMAT_VERSION = 1
+
+
+def artifact_key(generator, theme, payload):
+    """Canonical hash of a generation request: same inputs, same key."""
+    raw = json.dumps(
+        {
+            "v": ARTIFACT_FORMAT_VERSION,
+            "generator": generator,
+            "theme": theme,
+            "payload": payload,
+        },
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ArtifactStore:
+    """
+    Generated decks stored as ``<key>.pptx``, where the key is the
+    ``artifact_key`` of the request that produced them.
+
+    File mtimes double as LRU timestamps. Files unused for ``max_age``
+    seconds are dropped, and the least recently used go once the directory
+    exceeds ``max_bytes``. New artifacts are optionally mirrored to Blob
+    Storage on a background thread.
+    """
+
+    def __init__(self, directory=ARTIFACT_STORE_DIR, max_bytes=ARTIFACT_STORE_MAX_BYTES,
+                 max_age=ARTIFACT_STORE_MAX_AGE_SECONDS, mirror=ARTIFACT_MIRROR):
+        self.directory = directory
+        self.max_bytes = max(1, max_bytes)
+        self.max_age = max_age
+        self.mirror = mirror
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._mirror_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="artifact-mirror")
+        ensure_dir(directory)
+        self._bytes = sum(size for _, size, _ in self._entries())
+        self._enforce_retention()
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.pptx")
+
+    def _entries(self):
+        for name in os.listdir(self.directory):
+            if not name.endswith(".pptx"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            yield path, st.st_size, st.st_mtime
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _read(self, key):
+        path = self.path(key)
+        try:
+            with open(path, "rb") as fp:
+                data = fp.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def get(self, key):
+        """Artifact bytes, or None."""
+        data = self._read(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """Store artifact bytes atomically and return the path."""
+        path = self.path(key)
+        # Unique per call: batch workers in different processes share the store.
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+        # Generation takes seconds, so a directory scan per put is cheap.
+        self._enforce_retention()
+        if self.mirror:
+            self._mirror_pool.submit(self._mirror, key, path)
+        return path
+
+    def get_or_create(self, generator, theme, payload, build):
+        """
+        (key, bytes, created) for a request. ``build()`` runs only on a miss
+        and returns the deck as bytes or a buffer; concurrent identical
+        requests wait for the first build instead of repeating it.
+        """
+        key = artifact_key(generator, theme, payload)
+        data = self.get(key)
+        if data is not None:
+            return key, data, False
+
+        key_lock = self._key_lock(key)
+        try:
+            with key_lock:
+                data = self._read(key)
+                if data is not None:
+                    return key, data, False
+                out = build()
+                data = out.getvalue() if hasattr(out, "getvalue") else bytes(out)
+                self.put(key, data)
+        finally:
+            # Also when build() raises, so failed keys do not pile up.
+            with self._lock:
+                if self._key_locks.get(key) is key_lock:
+                    del self._key_locks[key]
+        logger.info(f"Generated artifact {key[:12]} ({generator}, {theme}, {len(data)} bytes)")
+        return key, data, True
+
+    def _mirror(self, key, path):
+        try:
+            from azure_blob_utils import upload_ppt_to_blob
+            upload_ppt_to_blob(path, f"{key}.pptx")
+        except Exception as e:
+            logger.warning(f"Artifact mirror failed for {key[:12]}: {e}")
+
+    def _enforce_retention(self):
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        cutoff = time.time() - self.max_age if self.max_age > 0 else None
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9) if total > self.max_bytes else total
+        removed = 0
+        for path, size, mtime in entries:
+            expired = cutoff is not None and mtime < cutoff
+            if not expired and total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except FileNotFoundError:
+                continue
+        with self._lock:
+            self._bytes = total
+        if removed:
+            logger.info(f"Artifact store removed {removed} files; {total} bytes in use")
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "bytes_used": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_artifact_store():
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = ArtifactStore()
+        return _default_store
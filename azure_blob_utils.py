@@ -1,5 +1,7 @@
 import os
-from azure.storage.blob import BlobServiceClient
+import shutil
+from blob_clients import get_container_client, transfer_options
+from blob_cache import get_source_blob_cache
 from utils import get_env, logger
 
 BLOB_CONN = get_env("AZURE_BLOB_CONN", required=True)
@@ -12,23 +14,27 @@ SOURCE_CONTAINER = get_env("AZURE_BLOB_CONTAINER", "ppt-dataset")
 
 
 def _get_container_client(container_name: str):
-    blob_service = BlobServiceClient.from_connection_string(BLOB_CONN)
-    container_client = blob_service.get_container_client(container_name)
-    try:
-        container_client.create_container()
-    except Exception:
-        # already exists
-        pass
-    return container_client
+    # Shared pooled client; existence is checked once per process.
+    return get_container_client(container_name, BLOB_CONN, ensure_exists=True)
 
 
 # ----------------------------
 # GENERATED PPT UPLOAD
 # ----------------------------
-def upload_ppt_to_blob(file_path, file_name):
+def upload_ppt_to_blob(data, file_name):
+    """
+    Upload a generated deck. ``data`` is a file path, bytes, or a
+    file-like buffer (e.g. the BytesIO returned by the generators),
+    which is streamed from its start without touching disk.
+    """
     container_client = _get_container_client(GENERATED_CONTAINER)
-    with open(file_path, "rb") as data:
-        container_client.upload_blob(name=file_name, data=data, overwrite=True)
+    if isinstance(data, (str, os.PathLike)):
+        with open(data, "rb") as fp:
+            container_client.upload_blob(name=file_name, data=fp, overwrite=True, **transfer_options())
+    else:
+        if hasattr(data, "seek"):
+            data.seek(0)
+        container_client.upload_blob(name=file_name, data=data, overwrite=True, **transfer_options())
     logger.info(f"Uploaded generated PPT to Azure Blob: {GENERATED_CONTAINER}/{file_name}")
     return f"{GENERATED_CONTAINER}/{file_name}"
 
@@ -59,7 +65,7 @@ def upload_source_ppt_to_blob(file_bytes, blob_name: str):
     blob_name: key to store under, usually original filename.
     """
     container_client = _get_container_client(SOURCE_CONTAINER)
-    container_client.upload_blob(name=blob_name, data=file_bytes, overwrite=True)
+    container_client.upload_blob(name=blob_name, data=file_bytes, overwrite=True, **transfer_options())
     logger.info(f"Uploaded SOURCE PPT to Azure Blob: {SOURCE_CONTAINER}/{blob_name}")
     return f"{SOURCE_CONTAINER}/{blob_name}"
 
@@ -89,23 +95,24 @@ def delete_source_ppt_from_blob(blob_name: str):
     try:
         container_client = _get_container_client(SOURCE_CONTAINER)
         container_client.delete_blob(blob_name)
+        get_source_blob_cache().invalidate(blob_name)
         logger.info(f"Deleted SOURCE PPT from Azure Blob: {SOURCE_CONTAINER}/{blob_name}")
     except Exception as e:
         logger.exception(f"Failed to delete SOURCE PPT from Azure Blob: {blob_name}")
         raise e
     
-def download_source_ppt_from_blob(blob_name: str, local_path: str):
+def download_source_ppt_from_blob(blob_name: str, local_path: str = None):
     """
-    Download a source PPT from SOURCE_CONTAINER to local_path.
+    Fetch a source PPT from SOURCE_CONTAINER through the local blob cache
+    (revalidated by ETag). Returns the cached path, or copies it to
+    local_path when one is given.
     """
     try:
-        blob_service = BlobServiceClient.from_connection_string(get_env("AZURE_BLOB_CONN", required=True))
-        container_client = blob_service.get_container_client(SOURCE_CONTAINER)
-        with open(local_path, "wb") as fp:
-            stream = container_client.download_blob(blob_name)
-            stream.readinto(fp)
-        logger.info(f"Downloaded SOURCE PPT {blob_name} -> {local_path}")
-        return local_path
+        cached_path = get_source_blob_cache().fetch(blob_name)
+        if local_path and os.path.abspath(local_path) != os.path.abspath(cached_path):
+            shutil.copyfile(cached_path, local_path)
+            return local_path
+        return cached_path
     except Exception as e:
         logger.exception(f"Failed to download source ppt {blob_name}: {e}")
         raise
@@ -0,0 +1,213 @@
+# batch_generate.py
+# Headless deck generation from JSON payloads, no Streamlit involved.
+#
+#   python -m batch_generate payloads/ --output-dir out/ --workers 4
+#
+# Inputs are .json files (one payload, or a list of them), .jsonl files
+# (one per line) or directories of those. A record is either a bare payload
+# ({"slides": [...]} / {"preview_slides": [...]}) or
+# {"name": ..., "theme": ..., "payload": {...}}.
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from utils import get_env, logger, ensure_dir
+from artifact_store import artifact_key
+
+BATCH_WORKERS = int(get_env("BATCH_WORKERS", os.cpu_count() or 1))
+
+GENERATORS = {
+    "cognizant": "generate_ppt_cognizant",
+    "auto": "generate_ppt_llm",
+}
+
+
+# ------------------------------------------------------------
+# INPUT
+# ------------------------------------------------------------
+def _records_from_file(path):
+    with open(path, encoding="utf-8") as fp:
+        if path.endswith(".jsonl"):
+            for line_no, line in enumerate(fp, start=1):
+                if line.strip():
+                    yield f"{path}:{line_no}", json.loads(line)
+            return
+        data = json.load(fp)
+    items = data if isinstance(data, list) else [data]
+    for i, item in enumerate(items):
+        yield path if len(items) == 1 else f"{path}[{i}]", item
+
+
+def iter_jobs(paths, default_theme="auto"):
+    """Yield (name, theme, payload, source) for every record under ``paths``."""
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(
+                os.path.join(path, f) for f in os.listdir(path)
+                if f.endswith((".json", ".jsonl"))
+            )
+        else:
+            files = [path]
+        for file_path in files:
+            for source, record in _records_from_file(file_path):
+                if "payload" in record:
+                    payload = record["payload"]
+                    theme = record.get("theme", default_theme)
+                    name = record.get("name")
+                else:
+                    payload, theme, name = record, default_theme, None
+                if theme not in GENERATORS:
+                    logger.warning(f"{source}: unknown theme '{theme}', using '{default_theme}'")
+                    theme = default_theme
+                yield name, theme, payload, source
+
+
+# ------------------------------------------------------------
+# WORKER (runs in the pool)
+# ------------------------------------------------------------
+def _init_worker(env):
+    # Applied before the generators (and llm_executor) are first imported,
+    # so each process gets its share of the rate limits.
+    os.environ.update(env)
+
+
+def _generate(theme, payload):
+    if GENERATORS[theme] == "generate_ppt_cognizant":
+        from generate_ppt_cognizant import generate_presentation_cognizant
+        return generate_presentation_cognizant(payload)
+    from generate_ppt_llm import generate_presentation
+    return generate_presentation(payload)
+
+
+def run_job(name, theme, payload, out_path, use_store=False):
+    """Generate one deck into ``out_path``. Returns a result dict."""
+    started = time.perf_counter()
+    try:
+        if use_store:
+            from artifact_store import get_artifact_store
+            _, data, _ = get_artifact_store().get_or_create(
+                GENERATORS[theme], theme, payload, lambda: _generate(theme, payload)
+            )
+        else:
+            data = _generate(theme, payload).getvalue()
+        tmp = f"{out_path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fp:
+            fp.write(data)
+        os.replace(tmp, out_path)
+        return {"name": name, "path": out_path, "ok": True,
+                "seconds": time.perf_counter() - started, "bytes": len(data)}
+    except Exception as e:
+        logger.exception(f"Generation failed for {name}")
+        return {"name": name, "path": out_path, "ok": False,
+                "seconds": time.perf_counter() - started, "error": str(e)}
+
+
+# ------------------------------------------------------------
+# DRIVER
+# ------------------------------------------------------------
+def _worker_env(workers):
+    """Split LLM_RPM / LLM_TPM across worker processes."""
+    env = {}
+    for name in ("LLM_RPM", "LLM_TPM"):
+        value = int(get_env(name, 0))
+        if value:
+            env[name] = str(max(1, value // workers))
+    return env
+
+
+def _percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def run_batch(paths, output_dir, theme="auto", workers=BATCH_WORKERS,
+              overwrite=False, use_store=False):
+    """
+    Generate every payload under ``paths`` into ``output_dir`` on a process
+    pool. Outputs are named after the record's ``name`` or its artifact key,
+    so re-running a batch skips decks that already exist.
+    """
+    ensure_dir(output_dir)
+    workers = max(1, workers)
+
+    jobs, skipped, seen = [], 0, set()
+    for name, job_theme, payload, source in iter_jobs(paths, theme):
+        key = artifact_key(GENERATORS[job_theme], job_theme, payload)
+        name = re.sub(r"[^\w.-]+", "_", str(name)) if name else key[:16]
+        out_path = os.path.join(output_dir, f"{name}.pptx")
+        if out_path in seen or (not overwrite and os.path.exists(out_path)):
+            skipped += 1
+            continue
+        seen.add(out_path)
+        jobs.append((name, job_theme, payload, out_path))
+
+    logger.info(f"Batch: {len(jobs)} decks to generate, {skipped} skipped, {workers} workers")
+    results = []
+    wall_start = time.perf_counter()
+    if jobs:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(jobs)),
+            initializer=_init_worker, initargs=(_worker_env(workers),)
+        ) as pool:
+            futures = [
+                pool.submit(run_job, name, job_theme, payload, out_path, use_store)
+                for name, job_theme, payload, out_path in jobs
+            ]
+            for done, fut in enumerate(as_completed(futures), start=1):
+                res = fut.result()
+                results.append(res)
+                status = "ok" if res["ok"] else f"FAILED: {res['error']}"
+                logger.info(f"[{done}/{len(jobs)}] {res['name']} {res['seconds']:.2f}s {status}")
+    wall = time.perf_counter() - wall_start
+
+    latencies = sorted(r["seconds"] for r in results if r["ok"])
+    summary = {
+        "decks": len(latencies),
+        "failed": sum(1 for r in results if not r["ok"]),
+        "skipped": skipped,
+        "workers": workers,
+        "wall_seconds": round(wall, 3),
+        "decks_per_second": round(len(latencies) / wall, 3) if wall > 0 else 0.0,
+    }
+    if latencies:
+        summary.update({
+            "latency_p50_s": round(_percentile(latencies, 50), 3),
+            "latency_p90_s": round(_percentile(latencies, 90), 3),
+            "latency_p99_s": round(_percentile(latencies, 99), 3),
+            "latency_max_s": round(latencies[-1], 3),
+        })
+    return summary, results
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate decks from JSON payloads.")
+    parser.add_argument("inputs", nargs="+", help=".json/.jsonl files or directories")
+    parser.add_argument("--output-dir", default="generated/batch")
+    parser.add_argument("--theme", default="auto", choices=sorted(GENERATORS),
+                        help="Theme for records that do not set one.")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    parser.add_argument("--overwrite", action="store_true",
+                        help="Regenerate decks whose output file already exists.")
+    parser.add_argument("--use-store", action="store_true",
+                        help="Serve and record decks through the artifact store.")
+    parser.add_argument("--report", help="Write the summary and per-deck results as JSON.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    summary, results = run_batch(
+        args.inputs, args.output_dir, theme=args.theme, workers=args.workers,
+        overwrite=args.overwrite, use_store=args.use_store
+    )
+    print(json.dumps(summary, indent=2))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as fp:
+            json.dump({"summary": summary, "results": results}, fp, indent=2)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
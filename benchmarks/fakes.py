@@ -0,0 +1,192 @@
+# benchmarks/fakes.py
+# In-process stand-ins for Azure Blob Storage and Azure OpenAI with
+# configurable latency. benchmarks.run installs them before the app
+# modules are imported; nothing here touches the network.
+import time
+import uuid
+import threading
+from types import SimpleNamespace
+from datetime import datetime, timezone
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotFoundError, ResourceNotModifiedError
+
+
+# ------------------------------------------------------------
+# BLOB STORAGE
+# ------------------------------------------------------------
+class FakeDownloader:
+    def __init__(self, data, props):
+        self._data = data
+        self.properties = props
+
+    def readinto(self, stream):
+        stream.write(self._data)
+        return len(self._data)
+
+    def readall(self):
+        return self._data
+
+
+class FakeBlobClient:
+    def __init__(self, container, name):
+        self.container = container
+        self.name = name
+
+    def get_blob_properties(self, **kwargs):
+        return self.container._props(self.name)
+
+
+class FakeContainerClient:
+    """
+    Dict-backed container. ``latency`` is added to every request and
+    ``bandwidth`` (bytes/s, 0 = unlimited) to downloads.
+    """
+
+    def __init__(self, name, latency=0.0, bandwidth=0):
+        self.container_name = name
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.requests = 0
+        self._blobs = {}
+        self._lock = threading.Lock()
+
+    def _request(self, size=0):
+        with self._lock:
+            self.requests += 1
+        delay = self.latency + (size / self.bandwidth if self.bandwidth else 0)
+        if delay:
+            time.sleep(delay)
+
+    def _props(self, name):
+        with self._lock:
+            if name not in self._blobs:
+                raise ResourceNotFoundError(f"Blob not found: {name}")
+            data, etag, modified = self._blobs[name]
+        return SimpleNamespace(name=name, etag=etag, last_modified=modified, size=len(data))
+
+    def exists(self, **kwargs):
+        return True
+
+    def create_container(self, **kwargs):
+        return None
+
+    def upload_blob(self, name, data, overwrite=False, **kwargs):
+        if hasattr(data, "read"):
+            data = data.read()
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self._request()
+        with self._lock:
+            self._blobs[name] = (bytes(data), f'"0x{uuid.uuid4().hex[:16].upper()}"',
+                                 datetime.now(timezone.utc))
+        return self.get_blob_client(name)
+
+    def list_blobs(self, **kwargs):
+        self._request()
+        with self._lock:
+            names = sorted(self._blobs)
+        return [self._props(n) for n in names]
+
+    def download_blob(self, blob, etag=None, match_condition=None, **kwargs):
+        props = self._props(blob)
+        if etag and match_condition == MatchConditions.IfModified and etag.strip('"') == props.etag.strip('"'):
+            self._request()
+            raise ResourceNotModifiedError("The condition specified using HTTP conditional header(s) is not met.")
+        with self._lock:
+            data = self._blobs[blob][0]
+        self._request(len(data))
+        return FakeDownloader(data, props)
+
+    def delete_blob(self, blob, **kwargs):
+        self._request()
+        with self._lock:
+            self._blobs.pop(blob, None)
+
+    def get_blob_client(self, blob):
+        return FakeBlobClient(self, blob)
+
+
+class FakeBlobService:
+    """Registry of fake containers; ``get_container_client`` mirrors blob_clients."""
+
+    def __init__(self, latency=0.0, bandwidth=0):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.containers = {}
+        self._lock = threading.Lock()
+
+    def get_container_client(self, container_name, conn_str=None, ensure_exists=False):
+        with self._lock:
+            if container_name not in self.containers:
+                self.containers[container_name] = FakeContainerClient(
+                    container_name, self.latency, self.bandwidth
+                )
+            return self.containers[container_name]
+
+
+# ------------------------------------------------------------
+# AZURE OPENAI
+# ------------------------------------------------------------
+class FakeLatency:
+    """Shared knobs, set by benchmarks.run before any client is built."""
+    embed_request = 0.05      # seconds per embeddings request
+    embed_item = 0.0005       # extra seconds per input text
+    chat_request = 0.8        # seconds per chat completion
+    dims = 256
+
+
+class _Embeddings:
+    def __init__(self, owner):
+        self.owner = owner
+        self._embedder = None
+
+    def create(self, model, input, **kwargs):
+        if self._embedder is None:
+            # Lexical vectors keep search results meaningful without a model.
+            # Imported lazily: utils builds a client while it is importing.
+            from embedding_providers import HashingEmbeddingProvider
+            self._embedder = HashingEmbeddingProvider(FakeLatency.dims)
+        texts = [input] if isinstance(input, str) else list(input)
+        time.sleep(FakeLatency.embed_request + FakeLatency.embed_item * len(texts))
+        self.owner._count("embeddings")
+        vectors = self._embedder.embed(texts)
+        return SimpleNamespace(
+            data=[SimpleNamespace(index=i, embedding=v) for i, v in enumerate(vectors)]
+        )
+
+
+class _ChatCompletions:
+    def __init__(self, owner):
+        self.owner = owner
+
+    def create(self, model, messages, **kwargs):
+        time.sleep(FakeLatency.chat_request)
+        self.owner._count("chat")
+        prompt = messages[-1]["content"]
+        if "questions" in prompt:
+            content = "\n".join(
+                f"{i}. What is the focus of aspect {i} for this slide?" for i in range(1, 4)
+            )
+        else:
+            content = "Title: Synthesized slide\n" + "\n".join(
+                f"- Key point {i} distilled from the user's answers" for i in range(1, 6)
+            )
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+        )
+
+
+class FakeAzureOpenAI:
+    """Drop-in for openai.AzureOpenAI covering embeddings and chat completions."""
+
+    calls = {"embeddings": 0, "chat": 0}
+    _calls_lock = threading.Lock()
+
+    def __init__(self, *args, **kwargs):
+        self.embeddings = _Embeddings(self)
+        self.chat = SimpleNamespace(completions=_ChatCompletions(self))
+
+    @classmethod
+    def _count(cls, kind):
+        with cls._calls_lock:
+            cls.calls[kind] += 1
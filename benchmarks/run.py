@@ -0,0 +1,316 @@
+# benchmarks/run.py
+# End-to-end benchmarks against in-process fakes.
+#
+#   python -m benchmarks.run --decks 6 --slides 20 --workers 8
+#
+# Every run gets a fresh temp directory for Chroma and the local caches, so
+# results are comparable across commits. Results are written as JSON.
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BASE_DIR, "benchmarks", "results")
+
+
+# ------------------------------------------------------------
+# HELPERS
+# ------------------------------------------------------------
+def summarize(samples):
+    """Latency summary in milliseconds."""
+    if not samples:
+        return {"n": 0}
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        "n": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50_ms": round(pct(50), 3),
+        "p90_ms": round(pct(90), 3),
+        "p99_ms": round(pct(99), 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+# ------------------------------------------------------------
+# ENVIRONMENT (must run before any app module is imported)
+# ------------------------------------------------------------
+def setup_environment(args, workdir):
+    env = {
+        "OPENAI_API_BASE": "https://fake.openai.azure.com",
+        "OPENAI_API_KEY": "fake",
+        "OPENAI_API_VERSION": "2024-05-01-preview",
+        "IMAGE_API_BASE": "https://fake.openai.azure.com",
+        "IMAGE_API_KEY": "fake",
+        "AZURE_BLOB_CONN": "DefaultEndpointsProtocol=https;AccountName=fake;AccountKey=ZmFrZQ==;EndpointSuffix=core.windows.net",
+        "AZURE_BLOB_CONTAINER": "ppt-dataset",
+        "CHAT_MODEL": "fake-chat",
+        "EMBEDDING_MODEL": "fake-embedding",
+        "EMBEDDING_DIM": "256",
+        "EMBEDDING_PROVIDER": args.embedding_provider,
+        "CHROMA_PERSIST_DIR": os.path.join(workdir, "chroma"),
+        "THUMBNAIL_CACHE_DIR": os.path.join(workdir, "thumbnails"),
+        "BLOB_CACHE_DIR": os.path.join(workdir, "blob_cache"),
+        "LLM_CACHE_MODE": args.llm_cache_mode,
+        "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING"),
+    }
+    os.environ.update(env)
+    sys.path.insert(0, BASE_DIR)
+
+    import openai
+    from benchmarks import fakes
+
+    fakes.FakeLatency.embed_request = args.embed_latency
+    fakes.FakeLatency.chat_request = args.chat_latency
+    openai.AzureOpenAI = fakes.FakeAzureOpenAI
+
+    blob_service = fakes.FakeBlobService(latency=args.blob_latency)
+    import blob_clients
+    blob_clients.get_container_client = blob_service.get_container_client
+    return blob_service
+
+
+# ------------------------------------------------------------
+# BENCHMARKS
+# ------------------------------------------------------------
+def bench_ingestion(args, workdir, source):
+    from benchmarks.synthetic_deck import make_deck
+    import ingestion_chroma
+
+    decks_dir = os.path.join(workdir, "decks")
+    os.makedirs(decks_dir, exist_ok=True)
+
+    def upload(prefix, seed_base):
+        for i in range(args.decks):
+            path = make_deck(
+                os.path.join(decks_dir, f"{prefix}_{i:03d}.pptx"),
+                slides=args.slides, shapes=args.shapes, groups=args.groups,
+                images=args.images, seed=seed_base + i
+            )
+            with open(path, "rb") as fp:
+                source.upload_blob(os.path.basename(path), fp, overwrite=True)
+
+    slides_per_set = args.decks * args.slides
+    results = {}
+
+    upload("sequential", 1000)
+    wall, _ = timed(ingestion_chroma.main, workers=0)
+    results["sequential"] = {
+        "decks": args.decks, "slides": slides_per_set, "seconds": round(wall, 3),
+        "slides_per_s": round(slides_per_set / wall, 2),
+    }
+
+    # New decks only; the sequential set is skipped via the manifest.
+    upload("pipeline", 2000)
+    wall, _ = timed(ingestion_chroma.main, workers=args.workers, batch_size=args.batch_size)
+    results["pipeline"] = {
+        "decks": args.decks, "slides": slides_per_set, "workers": args.workers,
+        "seconds": round(wall, 3), "slides_per_s": round(slides_per_set / wall, 2),
+    }
+
+    wall, _ = timed(ingestion_chroma.main, workers=args.workers, batch_size=args.batch_size)
+    results["unchanged_rescan"] = {"decks": args.decks * 2, "seconds": round(wall, 3)}
+    return results
+
+
+def bench_search(args):
+    from benchmarks.synthetic_deck import VOCAB
+    from search_utils import semantic_search
+
+    rng = random.Random(7)
+    queries = [
+        " ".join(rng.choice(VOCAB) for _ in range(rng.randint(2, 6)))
+        for _ in range(args.queries)
+    ]
+    cold = [timed(semantic_search, q, top_k=12)[0] for q in queries]
+    warm = [timed(semantic_search, q, top_k=12)[0] for q in queries]
+    return {"cold": summarize(cold), "warm": summarize(warm)}
+
+
+def bench_extraction(args):
+    from blob_cache import get_source_blob_cache
+    from slide_renderer import extract_slide_structure, extract_deck_structure
+    from thumbnail_cache import get_thumbnail_cache
+
+    local_ppt = get_source_blob_cache().fetch("pipeline_000.pptx")
+    indices = list(range(args.slides))
+
+    cold = [timed(extract_slide_structure, local_ppt, i)[0] for i in indices]
+    warm = [timed(extract_slide_structure, local_ppt, i)[0] for i in indices]
+
+    other_ppt = get_source_blob_cache().fetch("pipeline_001.pptx")
+    deck_wall, _ = timed(extract_deck_structure, other_ppt)
+    return {
+        "slide_cold": summarize(cold),
+        "slide_warm": summarize(warm),
+        "deck_cold": {"slides": args.slides, "seconds": round(deck_wall, 3)},
+        "thumbnail_cache": get_thumbnail_cache().stats(),
+    }
+
+
+def _payloads(args):
+    from benchmarks.synthetic_deck import _sentence
+
+    rng = random.Random(11)
+    n = args.generated_slides
+    preview = [{"title": _sentence(rng, (3, 6)), "bullets": []}] + [
+        {"title": _sentence(rng, (3, 6)), "bullets": [_sentence(rng) for _ in range(5)]}
+        for _ in range(n - 1)
+    ]
+    qa_slides, answers = [], {}
+    for i in range(n):
+        qa_slides.append({"slide_index": i, "slide_title": _sentence(rng, (3, 6))})
+        if i == 0:
+            answers[str(i)] = {"What should be the title of this presentation?": "Benchmark deck"}
+        else:
+            answers[str(i)] = {
+                "What is the objective of this slide?": _sentence(rng),
+                "What are the key points to be added to this slide?": _sentence(rng),
+            }
+    selected = [
+        {"slide_index": i, "slide_id": f"bench_Slide_{i:02d}", "title": s["slide_title"]}
+        for i, s in enumerate(qa_slides)
+    ]
+    return {
+        "basic": {"selected_slides": selected, "answers_map": answers},
+        "llm_qa": {"slides": qa_slides, "answers_map": answers},
+        "preview": {"slides": preview},
+    }
+
+
+def bench_generators(args):
+    from generate_ppt import generate_presentation as generate_basic
+    from generate_ppt_llm import generate_presentation as generate_llm
+    from generate_ppt_cognizant import generate_presentation_cognizant
+
+    payloads = _payloads(args)
+    runs = {
+        "generate_ppt": lambda: generate_basic(payloads["basic"]),
+        "generate_ppt_llm_preview": lambda: generate_llm(payloads["preview"]),
+        "generate_ppt_llm_qa": lambda: generate_llm(payloads["llm_qa"]),
+        "generate_ppt_cognizant": lambda: generate_presentation_cognizant(payloads["preview"]),
+    }
+    results = {}
+    for name, fn in runs.items():
+        samples = [timed(fn)[0] for _ in range(args.repeat)]
+        results[name] = summarize(samples)
+    return results
+
+
+# ------------------------------------------------------------
+# MAIN
+# ------------------------------------------------------------
+SUITES = ("ingestion", "search", "extraction", "generators")
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the end-to-end benchmark suite.")
+    parser.add_argument("--suites", default=",".join(SUITES),
+                        help=f"Comma-separated subset of: {', '.join(SUITES)}")
+    parser.add_argument("--decks", type=int, default=6, help="Decks per ingestion set.")
+    parser.add_argument("--slides", type=int, default=20, help="Slides per synthetic deck.")
+    parser.add_argument("--shapes", type=int, default=3, help="Extra text boxes per slide.")
+    parser.add_argument("--groups", type=int, default=1, help="Group shapes per slide.")
+    parser.add_argument("--images", type=int, default=1, help="Pictures per slide.")
+    parser.add_argument("--workers", type=int, default=8, help="Ingestion pipeline workers.")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=100, help="Search queries per pass.")
+    parser.add_argument("--generated-slides", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per generator.")
+    parser.add_argument("--embed-latency", type=float, default=0.05,
+                        help="Fake seconds per embeddings request.")
+    parser.add_argument("--chat-latency", type=float, default=0.8,
+                        help="Fake seconds per chat completion.")
+    parser.add_argument("--blob-latency", type=float, default=0.02,
+                        help="Fake seconds per blob request.")
+    parser.add_argument("--embedding-provider", default="azure", choices=("azure", "local"))
+    parser.add_argument("--llm-cache-mode", default="off", choices=("off", "readwrite", "replay"))
+    parser.add_argument("--output", help="JSON output path (default: benchmarks/results/).")
+    parser.add_argument("--keep", action="store_true", help="Keep the temp working directory.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    suites = [s.strip() for s in args.suites.split(",") if s.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        raise SystemExit(f"Unknown suites: {', '.join(sorted(unknown))}")
+    if ("extraction" in suites or "search" in suites) and "ingestion" not in suites:
+        raise SystemExit("search/extraction need the ingestion suite to populate the index")
+
+    workdir = tempfile.mkdtemp(prefix="ppt_bench_")
+    blob_service = setup_environment(args, workdir)
+    source = blob_service.get_container_client(os.environ["AZURE_BLOB_CONTAINER"])
+
+    results = {}
+    try:
+        for suite in suites:
+            print(f"Running {suite}...", flush=True)
+            if suite == "ingestion":
+                results[suite] = bench_ingestion(args, workdir, source)
+            elif suite == "search":
+                results[suite] = bench_search(args)
+            elif suite == "extraction":
+                results[suite] = bench_extraction(args)
+            elif suite == "generators":
+                results[suite] = bench_generators(args)
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    from benchmarks.fakes import FakeAzureOpenAI
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": vars(args),
+        "api_calls": dict(FakeAzureOpenAI.calls),
+        "blob_requests": {
+            name: c.requests for name, c in blob_service.containers.items()
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}_{commit}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as fp:
+        json.dump(report, fp, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"Wrote {output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
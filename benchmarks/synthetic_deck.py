@@ -0,0 +1,106 @@
+# benchmarks/synthetic_deck.py
+# Synthetic .pptx decks for benchmarks: configurable slide count, text
+# shapes, group shapes and pictures, deterministic for a given seed.
+import random
+import argparse
+from io import BytesIO
+from pptx import Presentation
+from pptx.util import Inches, Pt
+from PIL import Image, ImageDraw
+
+VOCAB = (
+    "cloud migration roadmap strategy platform data analytics governance security "
+    "claims member provider payer healthcare digital transformation operating model "
+    "automation workflow integration api modernization legacy assessment pilot rollout "
+    "benefits savings revenue risk compliance timeline phase milestone stakeholder "
+    "architecture target state current state capability gap vendor partner delivery "
+    "agile devops testing quality customer experience portal mobile reporting insights"
+).split()
+
+
+def _sentence(rng, words=(6, 14)):
+    n = rng.randint(*words)
+    text = " ".join(rng.choice(VOCAB) for _ in range(n))
+    return text[0].upper() + text[1:]
+
+
+def _picture_bytes(rng, size=(640, 360)):
+    img = Image.new("RGB", size, tuple(rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(img)
+    for _ in range(12):
+        x0, y0 = rng.randrange(size[0]), rng.randrange(size[1])
+        draw.rectangle(
+            [x0, y0, x0 + rng.randint(20, 200), y0 + rng.randint(20, 120)],
+            fill=tuple(rng.randrange(256) for _ in range(3))
+        )
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    buf.seek(0)
+    return buf
+
+
+def make_deck(path, slides=20, shapes=3, groups=1, images=1, bullets=5, seed=0):
+    """
+    Write a deck to ``path``. Slide 0 is a title slide, the last one a
+    thank-you slide; every other slide has a title, ``bullets`` bullets,
+    ``shapes`` extra text boxes, ``groups`` two-box groups and ``images``
+    pictures. Returns ``path``.
+    """
+    rng = random.Random(seed)
+    prs = Presentation()
+
+    title = prs.slides.add_slide(prs.slide_layouts[0])
+    title.shapes.title.text = _sentence(rng, (3, 6))
+    title.placeholders[1].text = "Synthetic benchmark deck"
+
+    for _ in range(max(0, slides - 2)):
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = _sentence(rng, (3, 7))
+        body = slide.placeholders[1].text_frame
+        body.text = _sentence(rng)
+        for _ in range(bullets - 1):
+            body.add_paragraph().text = _sentence(rng)
+
+        for i in range(shapes):
+            box = slide.shapes.add_textbox(
+                Inches(0.5 + 3 * (i % 3)), Inches(6.2), Inches(2.8), Inches(0.8)
+            )
+            box.text_frame.text = _sentence(rng, (3, 8))
+            box.text_frame.paragraphs[0].font.size = Pt(12)
+
+        for g in range(groups):
+            group = slide.shapes.add_group_shape()
+            for j in range(2):
+                box = group.shapes.add_textbox(
+                    Inches(6.5 + j * 1.5), Inches(1.5 + g), Inches(1.4), Inches(0.8)
+                )
+                box.text_frame.text = _sentence(rng, (2, 5))
+
+        for k in range(images):
+            slide.shapes.add_picture(
+                _picture_bytes(rng), Inches(6.5), Inches(3 + k * 0.3), width=Inches(3)
+            )
+
+    if slides > 1:
+        thanks = prs.slides.add_slide(prs.slide_layouts[5])
+        thanks.shapes.title.text = "Thank You"
+
+    prs.save(path)
+    return path
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic benchmark deck.")
+    parser.add_argument("path")
+    parser.add_argument("--slides", type=int, default=20)
+    parser.add_argument("--shapes", type=int, default=3)
+    parser.add_argument("--groups", type=int, default=1)
+    parser.add_argument("--images", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    make_deck(args.path, slides=args.slides, shapes=args.shapes,
+              groups=args.groups, images=args.images, seed=args.seed)
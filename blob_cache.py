@@ -0,0 +1,193 @@
+# blob_cache.py
+import os
+import time
+import hashlib
+import tempfile
+import threading
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotModifiedError
+from blob_clients import get_container_client, transfer_options
+from utils import get_env, logger, open_sqlite, ensure_dir
+
+BLOB_CACHE_DIR = get_env(
+    "BLOB_CACHE_DIR", os.path.join(tempfile.gettempdir(), "ppt_source_cache")
+)
+BLOB_CACHE_MAX_BYTES = int(get_env("BLOB_CACHE_MAX_BYTES", 2 * 1024 * 1024 * 1024))
+
+
+class BlobCache:
+    """
+    Local copies of blobs from one container, revalidated against the
+    service with a conditional GET (If-None-Match on the cached ETag).
+
+    Downloads land in a temp file and are renamed into place, so readers
+    never see a partial deck. Total size is capped at ``max_bytes``; the
+    least recently fetched files are evicted first.
+    """
+
+    def __init__(self, container_client, directory=BLOB_CACHE_DIR,
+                 max_bytes=BLOB_CACHE_MAX_BYTES):
+        self.container_client = container_client
+        self.directory = directory
+        self.max_bytes = max(1, max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._blob_locks = {}
+        ensure_dir(directory)
+        self._conn = open_sqlite(os.path.join(directory, "index.sqlite3"))
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS blob_cache (
+                    blob_name   TEXT PRIMARY KEY,
+                    local_name  TEXT NOT NULL,
+                    etag        TEXT,
+                    size        INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+
+    def _local_path(self, blob_name):
+        digest = hashlib.sha1(blob_name.encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.directory, f"{digest}_{os.path.basename(blob_name)}")
+
+    def _entry(self, blob_name):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT local_name, etag FROM blob_cache WHERE blob_name = ?", (blob_name,)
+            ).fetchone()
+        if not row:
+            return None
+        path = os.path.join(self.directory, row[0])
+        return (path, row[1]) if os.path.exists(path) else None
+
+    def _touch(self, blob_name):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE blob_cache SET last_access = ? WHERE blob_name = ?",
+                (time.time(), blob_name),
+            )
+
+    def _blob_lock(self, blob_name):
+        with self._lock:
+            return self._blob_locks.setdefault(blob_name, threading.Lock())
+
+    def fetch(self, blob_name, etag=None):
+        """
+        Local path of an up-to-date copy of ``blob_name``.
+        When the caller already knows the current ``etag`` (e.g. from a
+        listing) and it matches the cached copy, no request is made.
+        """
+        with self._blob_lock(blob_name):
+            entry = self._entry(blob_name)
+            if entry and etag and entry[1] == str(etag).strip('"'):
+                self._count(hit=True)
+                self._touch(blob_name)
+                return entry[0]
+
+            kwargs = {}
+            if entry and entry[1]:
+                kwargs = {"etag": entry[1], "match_condition": MatchConditions.IfModified}
+            try:
+                stream = self.container_client.download_blob(
+                    blob_name, **kwargs, **transfer_options()
+                )
+            except ResourceNotModifiedError:
+                self._count(hit=True)
+                self._touch(blob_name)
+                return entry[0]
+
+            self._count(hit=False)
+            path = self._local_path(blob_name)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp, "wb") as fp:
+                    stream.readinto(fp)
+                os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+
+            new_etag = str(stream.properties.etag or "").strip('"') or None
+            size = os.path.getsize(path)
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO blob_cache "
+                    "(blob_name, local_name, etag, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (blob_name, os.path.basename(path), new_etag, size, time.time()),
+                )
+            logger.info(f"Downloaded {blob_name} -> {path} ({size} bytes)")
+
+        self._evict(keep=blob_name)
+        return path
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _evict(self, keep=None):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT blob_name, local_name, size FROM blob_cache ORDER BY last_access ASC"
+            ).fetchall()
+        total = sum(r[2] for r in rows)
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        for blob_name, local_name, size in rows:
+            if total <= target:
+                break
+            if blob_name == keep:
+                continue
+            self.invalidate(blob_name)
+            total -= size
+
+    def invalidate(self, blob_name):
+        """Drop the local copy of ``blob_name`` (e.g. after it is deleted)."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT local_name FROM blob_cache WHERE blob_name = ?", (blob_name,)
+            ).fetchone()
+            self._conn.execute("DELETE FROM blob_cache WHERE blob_name = ?", (blob_name,))
+        if row:
+            try:
+                os.remove(os.path.join(self.directory, row[0]))
+            except FileNotFoundError:
+                pass
+            logger.info(f"Blob cache dropped {blob_name}")
+
+    def stats(self):
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blob_cache"
+            ).fetchone()
+            total = self.hits + self.misses
+            return {
+                "blobs": count,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "bytes_used": size,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_source_cache = None
+_source_lock = threading.Lock()
+
+
+def get_source_blob_cache():
+    """Cache for the source dataset container (AZURE_BLOB_CONTAINER)."""
+    global _source_cache
+    with _source_lock:
+        if _source_cache is None:
+            container_client = get_container_client(
+                get_env("AZURE_BLOB_CONTAINER", "ppt-dataset")
+            )
+            _source_cache = BlobCache(container_client)
+        return _source_cache
@@ -0,0 +1,82 @@
+# blob_clients.py
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from azure.core.exceptions import ResourceExistsError
+from azure.core.pipeline.transport import RequestsTransport
+from azure.storage.blob import BlobServiceClient
+from utils import get_env, logger
+
+# Parallel transfer settings for large decks (see azure-storage-blob docs).
+BLOB_MAX_CONCURRENCY = int(get_env("BLOB_MAX_CONCURRENCY", 4))
+BLOB_MAX_BLOCK_SIZE = int(get_env("BLOB_MAX_BLOCK_SIZE", 4 * 1024 * 1024))
+BLOB_MAX_SINGLE_PUT_SIZE = int(get_env("BLOB_MAX_SINGLE_PUT_SIZE", 8 * 1024 * 1024))
+BLOB_MAX_SINGLE_GET_SIZE = int(get_env("BLOB_MAX_SINGLE_GET_SIZE", 32 * 1024 * 1024))
+BLOB_MAX_CHUNK_GET_SIZE = int(get_env("BLOB_MAX_CHUNK_GET_SIZE", 4 * 1024 * 1024))
+BLOB_POOL_SIZE = int(get_env("BLOB_POOL_SIZE", 16))
+
+_lock = threading.Lock()
+_service_clients = {}     # connection string -> BlobServiceClient
+_container_clients = {}   # (connection string, container) -> ContainerClient
+_ensured = set()
+
+
+def transfer_options():
+    """Keyword arguments for upload_blob / download_blob."""
+    return {"max_concurrency": BLOB_MAX_CONCURRENCY}
+
+
+def _new_service_client(conn_str):
+    # One keep-alive connection pool per service client, shared by all of its
+    # container clients and sized for the parallel transfer threads.
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=BLOB_POOL_SIZE, pool_maxsize=BLOB_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return BlobServiceClient.from_connection_string(
+        conn_str,
+        transport=RequestsTransport(session=session, session_owner=False),
+        max_block_size=BLOB_MAX_BLOCK_SIZE,
+        max_single_put_size=BLOB_MAX_SINGLE_PUT_SIZE,
+        max_single_get_size=BLOB_MAX_SINGLE_GET_SIZE,
+        max_chunk_get_size=BLOB_MAX_CHUNK_GET_SIZE,
+    )
+
+
+def get_service_client(conn_str=None):
+    conn_str = conn_str or get_env("AZURE_BLOB_CONN", required=True)
+    with _lock:
+        client = _service_clients.get(conn_str)
+        if client is None:
+            client = _new_service_client(conn_str)
+            _service_clients[conn_str] = client
+        return client
+
+
+def get_container_client(container_name, conn_str=None, ensure_exists=False):
+    """
+    Long-lived ContainerClient for ``container_name``. With ``ensure_exists``
+    the container is created if missing, checked once per process.
+    """
+    conn_str = conn_str or get_env("AZURE_BLOB_CONN", required=True)
+    key = (conn_str, container_name)
+    service = get_service_client(conn_str)
+    with _lock:
+        client = _container_clients.get(key)
+        if client is None:
+            client = service.get_container_client(container_name)
+            _container_clients[key] = client
+        if not ensure_exists or key in _ensured:
+            return client
+
+    # The existence check is a network round-trip, so it runs outside the
+    # lock; concurrent first callers may both check, which is harmless.
+    try:
+        if not client.exists():
+            client.create_container()
+            logger.info(f"Created blob container: {container_name}")
+    except ResourceExistsError:
+        pass
+    with _lock:
+        _ensured.add(key)
+    return client
@@ -0,0 +1,80 @@
+# catalog_loader.py
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from azure_blob_utils import download_source_ppt_from_blob
+from slide_renderer import extract_deck_structure, render_slides_async
+from utils import get_env, logger
+
+CATALOG_WORKERS = int(get_env("CATALOG_WORKERS", 8))
+# Slides per render task: each task parses its deck once, so larger chunks
+# mean fewer parses and smaller ones mean earlier first thumbnails.
+CATALOG_RENDER_CHUNK = int(get_env("CATALOG_RENDER_CHUNK", 4))
+
+
+def group_refs_by_deck(refs):
+    """{ppt_name: [refs...]} in first-seen (relevance) order, duplicates dropped."""
+    decks = OrderedDict()
+    seen = set()
+    for r in refs:
+        key = (r["ppt_name"], r["slide_index"])
+        if key in seen:
+            continue
+        seen.add(key)
+        decks.setdefault(r["ppt_name"], []).append(r)
+    return decks
+
+
+def _prepare_deck(ppt_blob, deck_refs):
+    """Download one deck and read the text structure of the referenced slides."""
+    local_ppt = download_source_ppt_from_blob(ppt_blob)
+    indices = [r["slide_index"] for r in deck_refs]
+    structs = extract_deck_structure(local_ppt, indices, render=False)
+    for struct, r in zip(structs, deck_refs):
+        struct["ppt_blob"] = ppt_blob
+        struct["slide_id"] = r["slide_id"]
+    return local_ppt, structs
+
+
+def load_catalog(refs, workers=CATALOG_WORKERS, chunk=CATALOG_RENDER_CHUNK):
+    """
+    Yield slide structs for search references as soon as each thumbnail is
+    ready (completion order, not relevance order).
+
+    Distinct decks are downloaded and parsed concurrently on a thread pool;
+    thumbnails are rendered ``chunk`` slides per task on the renderer's
+    process pool. Failed decks or slide chunks are logged and skipped.
+    """
+    decks = group_refs_by_deck(refs)
+    if not decks:
+        return
+    chunk = max(1, chunk)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(decks)))) as pool:
+        pending = {
+            pool.submit(_prepare_deck, ppt_blob, deck_refs): ("deck", ppt_blob)
+            for ppt_blob, deck_refs in decks.items()
+        }
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                kind, payload = pending.pop(fut)
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    name = payload if kind == "deck" else [s["slide_id"] for s in payload]
+                    logger.exception(f"Failed loading {kind} {name}: {e}")
+                    continue
+
+                if kind == "deck":
+                    local_ppt, structs = result
+                    for start in range(0, len(structs), chunk):
+                        group = structs[start:start + chunk]
+                        render_fut = render_slides_async(
+                            local_ppt, [struct["slide_index"] for struct in group]
+                        )
+                        pending[render_fut] = ("slides", group)
+                else:
+                    for struct in payload:
+                        struct["png_path"] = result[struct["slide_index"]]
+                        yield struct
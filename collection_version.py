@@ -0,0 +1,69 @@
+# collection_version.py
+import os
+import threading
+from utils import get_env, open_sqlite
+
+KB_STATE_PATH = get_env(
+    "KB_STATE_PATH",
+    os.path.join(get_env("CHROMA_PERSIST_DIR", "./chroma_db"), "kb_state.sqlite3")
+)
+
+_lock = threading.Lock()
+_conn = None
+
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        _conn = open_sqlite(KB_STATE_PATH)
+        with _conn:
+            _conn.execute(
+                "CREATE TABLE IF NOT EXISTS kb_state (key TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            _conn.execute(
+                "INSERT OR IGNORE INTO kb_state (key, value) VALUES ('collection_version', 0)"
+            )
+    return _conn
+
+
+def get_collection_version():
+    """
+    Monotonic counter bumped whenever slides are added to or removed from the
+    collection. Stored on disk so the UI sees bumps made by a separate
+    ingestion process.
+    """
+    with _lock:
+        row = _get_conn().execute(
+            "SELECT value FROM kb_state WHERE key = 'collection_version'"
+        ).fetchone()
+    return row[0] if row else 0
+
+
+def bump_collection_version():
+    with _lock:
+        conn = _get_conn()
+        with conn:
+            conn.execute(
+                "UPDATE kb_state SET value = value + 1 WHERE key = 'collection_version'"
+            )
+        return conn.execute(
+            "SELECT value FROM kb_state WHERE key = 'collection_version'"
+        ).fetchone()[0]
+
+
+def get_kb_state(key, default=0):
+    """Integer flag/counter from the kb_state store, e.g. a one-time migration marker."""
+    with _lock:
+        row = _get_conn().execute(
+            "SELECT value FROM kb_state WHERE key = ?", (key,)
+        ).fetchone()
+    return row[0] if row else default
+
+
+def set_kb_state(key, value):
+    with _lock:
+        conn = _get_conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO kb_state (key, value) VALUES (?, ?)", (key, int(value))
+            )
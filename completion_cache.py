@@ -0,0 +1,182 @@
+# completion_cache.py
+import os
+import time
+import json
+import hashlib
+import threading
+from utils import get_env, logger, open_sqlite
+
+LLM_CACHE_PATH = get_env(
+    "LLM_CACHE_PATH",
+    os.path.join(get_env("CHROMA_PERSIST_DIR", "./chroma_db"), "llm_cache.sqlite3")
+)
+# off: no caching | readwrite: serve hits, store misses | replay: cache only, misses raise
+LLM_CACHE_MODE = get_env("LLM_CACHE_MODE", "readwrite").lower()
+LLM_CACHE_TTL_SECONDS = int(get_env("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+LLM_CACHE_MAX_ENTRIES = int(get_env("LLM_CACHE_MAX_ENTRIES", 20000))
+# In replay mode, sleep for the latency recorded with each entry.
+LLM_CACHE_REPLAY_LATENCY = get_env("LLM_CACHE_REPLAY_LATENCY", "true").lower() in ("1", "true", "yes")
+
+CACHE_MODES = ("off", "readwrite", "replay")
+
+
+class CompletionCacheMiss(LookupError):
+    """Raised in replay mode when a prompt has no cached completion."""
+
+
+def completion_key(model, messages, **params):
+    raw = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """
+    Chat completion text keyed by (deployment, messages, sampling params).
+
+    Entries expire after ``ttl`` seconds; past ``max_entries`` the least
+    recently used tenth is evicted. Each entry keeps the latency of the
+    original call so replay runs report realistic timings.
+    """
+
+    def __init__(self, path=LLM_CACHE_PATH, ttl=LLM_CACHE_TTL_SECONDS,
+                 max_entries=LLM_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(path)
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS completions (
+                    key         TEXT PRIMARY KEY,
+                    model       TEXT NOT NULL,
+                    content     TEXT NOT NULL,
+                    latency     REAL NOT NULL,
+                    created_at  REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_completions_access ON completions(last_access)"
+            )
+        self._count = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+    def get(self, key):
+        """(content, latency) for a live entry, or None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, latency, created_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row and self.ttl > 0 and now - row[2] > self.ttl:
+                with self._conn:
+                    self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._count -= 1
+                row = None
+            if not row:
+                self.misses += 1
+                return None
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE completions SET last_access = ? WHERE key = ?", (now, key)
+                )
+            self.hits += 1
+            return row[0], row[1]
+
+    def put(self, key, model, content, latency):
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                before = self._conn.total_changes
+                exists = self._conn.execute(
+                    "SELECT 1 FROM completions WHERE key = ?", (key,)
+                ).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO completions "
+                    "(key, model, content, latency, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, content, latency, now, now),
+                )
+                if not exists and self._conn.total_changes > before:
+                    self._count += 1
+            if self._count > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        target = int(self.max_entries * 0.9)
+        with self._conn:
+            if self.ttl > 0:
+                self._conn.execute(
+                    "DELETE FROM completions WHERE created_at < ?", (time.time() - self.ttl,)
+                )
+            count = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+            if count > target:
+                self._conn.execute(
+                    "DELETE FROM completions WHERE key IN ("
+                    "SELECT key FROM completions ORDER BY last_access ASC LIMIT ?)",
+                    (count - target,),
+                )
+        self._count = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        logger.info(f"Completion cache evicted down to {self._count} entries")
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": self._count,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_completion_cache():
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = CompletionCache()
+        return _default_cache
+
+
+def cached_chat_completion(client, model, messages, mode=None, **params):
+    """
+    Message content of a chat completion, served from the cache when
+    possible. ``mode`` defaults to LLM_CACHE_MODE.
+    """
+    mode = (mode or LLM_CACHE_MODE).lower()
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Unsupported LLM_CACHE_MODE: {mode}")
+
+    if mode == "off":
+        resp = client.chat.completions.create(model=model, messages=messages, **params)
+        return resp.choices[0].message.content or ""
+
+    cache = get_completion_cache()
+    key = completion_key(model, messages, **params)
+    hit = cache.get(key)
+    if hit:
+        content, latency = hit
+        if mode == "replay" and LLM_CACHE_REPLAY_LATENCY:
+            time.sleep(latency)
+        return content
+
+    if mode == "replay":
+        raise CompletionCacheMiss(f"No cached completion for {model} prompt {key[:12]}")
+
+    start = time.perf_counter()
+    resp = client.chat.completions.create(model=model, messages=messages, **params)
+    latency = time.perf_counter() - start
+    content = resp.choices[0].message.content or ""
+    cache.put(key, model, content, latency)
+    return content
@@ -0,0 +1,114 @@
+# deck_cache.py
+import os
+import threading
+from collections import OrderedDict
+from pptx import Presentation
+from utils import get_env, logger
+
+DECK_CACHE_MAX_BYTES = int(get_env("DECK_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+
+class DeckCache:
+    """
+    Process-wide cache of parsed Presentation objects keyed by
+    (path, mtime, size) or an explicit version key such as the blob ETag.
+
+    Memory is approximated by the size of the .pptx on disk; least recently
+    used decks are dropped once the total exceeds ``max_bytes``. Cached decks
+    are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes=DECK_CACHE_MAX_BYTES):
+        self.max_bytes = max(1, max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()   # key -> (Presentation, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    @staticmethod
+    def _key(ppt_path, version=None):
+        path = os.path.abspath(ppt_path)
+        if version:
+            return (path, str(version))
+        st = os.stat(path)
+        return (path, st.st_mtime_ns, st.st_size)
+
+    def get(self, ppt_path, version=None):
+        """Parsed Presentation for ``ppt_path``; parses at most once per version."""
+        key = self._key(ppt_path, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Concurrent callers for the same deck wait for a single parse.
+        try:
+            with key_lock:
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry:
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        return entry[0]
+                    self.misses += 1
+
+                prs = Presentation(ppt_path)
+                size = os.path.getsize(ppt_path)
+
+                with self._lock:
+                    self._entries[key] = (prs, size)
+                    self._bytes += size
+                    self._evict()
+        finally:
+            # Also on a failed parse, so corrupt decks do not leak locks.
+            with self._lock:
+                if self._key_locks.get(key) is key_lock:
+                    del self._key_locks[key]
+        return prs
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            key, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            logger.info(f"Deck cache evicted {key[0]}")
+
+    def invalidate(self, ppt_path):
+        path = os.path.abspath(ppt_path)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == path]:
+                _, size = self._entries.pop(key)
+                self._bytes -= size
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "decks": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "bytes_used": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_deck_cache():
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = DeckCache()
+        return _default_cache
+
+
+def load_presentation(ppt_path, version=None):
+    """Shortcut for get_deck_cache().get(...)."""
+    return get_deck_cache().get(ppt_path, version)
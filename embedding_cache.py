@@ -0,0 +1,165 @@
+# embedding_cache.py
+import os
+import time
+import struct
+import hashlib
+import threading
+from utils import get_env, logger, open_sqlite
+
+EMBED_CACHE_PATH = get_env(
+    "EMBED_CACHE_PATH",
+    os.path.join(get_env("CHROMA_PERSIST_DIR", "./chroma_db"), "embedding_cache.sqlite3")
+)
+EMBED_CACHE_MAX_ENTRIES = int(get_env("EMBED_CACHE_MAX_ENTRIES", 500000))
+# float16 halves the footprint; cosine ranking is unaffected in practice.
+EMBED_CACHE_DTYPE = get_env("EMBED_CACHE_DTYPE", "float32")
+
+_STRUCT_CODES = {"float32": "f", "float16": "e"}
+
+
+def normalize_text(text):
+    return " ".join((text or "").split())
+
+
+def text_key(text):
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache keyed by (model, dimensions, hash of normalized text).
+
+    Vectors are stored as packed float32/float16 blobs. When the cache grows
+    past ``max_entries`` the least recently used tenth is evicted.
+    """
+
+    def __init__(self, path=EMBED_CACHE_PATH, max_entries=EMBED_CACHE_MAX_ENTRIES,
+                 dtype=EMBED_CACHE_DTYPE):
+        if dtype not in _STRUCT_CODES:
+            raise ValueError(f"Unsupported embedding cache dtype: {dtype}")
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.dtype = dtype
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(path)
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model       TEXT NOT NULL,
+                    dims        INTEGER NOT NULL,
+                    text_hash   TEXT NOT NULL,
+                    dtype       TEXT NOT NULL,
+                    vector      BLOB NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (model, dims, text_hash)
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_embeddings_access ON embeddings(last_access)"
+            )
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _pack(self, vector):
+        return struct.pack(f"<{len(vector)}{_STRUCT_CODES[self.dtype]}", *vector)
+
+    @staticmethod
+    def _unpack(blob, dtype):
+        code = _STRUCT_CODES[dtype]
+        n = len(blob) // struct.calcsize(code)
+        return list(struct.unpack(f"<{n}{code}", blob))
+
+    def get_many(self, model, dims, texts):
+        """Return {position: vector} for the texts already cached."""
+        keys = [text_key(t) for t in texts]
+        found = {}
+        with self._lock:
+            rows = {}
+            unique = list(set(keys))
+            # Stay under SQLite's bound-parameter limit.
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                for text_hash, dtype, blob in self._conn.execute(
+                    f"SELECT text_hash, dtype, vector FROM embeddings "
+                    f"WHERE model = ? AND dims = ? AND text_hash IN ({marks})",
+                    [model, dims, *chunk],
+                ):
+                    rows[text_hash] = self._unpack(blob, dtype)
+            if rows:
+                now = time.time()
+                with self._conn:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_access = ? "
+                        "WHERE model = ? AND dims = ? AND text_hash = ?",
+                        [(now, model, dims, h) for h in rows],
+                    )
+            for i, k in enumerate(keys):
+                if k in rows:
+                    found[i] = rows[k]
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, model, dims, texts, vectors):
+        now = time.time()
+        records = {
+            text_key(t): (model, dims, text_key(t), self.dtype, self._pack(v), now)
+            for t, v in zip(texts, vectors)
+        }
+        with self._lock:
+            with self._conn:
+                # Insert new keys first so only they are counted, then
+                # refresh the vectors of keys that were already cached.
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO embeddings "
+                    "(model, dims, text_hash, dtype, vector, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    list(records.values()),
+                )
+                self._count += self._conn.total_changes - before
+                self._conn.executemany(
+                    "UPDATE embeddings SET dtype = ?, vector = ?, last_access = ? "
+                    "WHERE model = ? AND dims = ? AND text_hash = ?",
+                    [(d, vec, ts, m, n, h) for m, n, h, d, vec, ts in records.values()],
+                )
+            if self._count > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        target = int(self.max_entries * 0.9)
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN ("
+                "SELECT rowid FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+                (self._count - target,),
+            )
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        logger.info(f"Embedding cache evicted down to {self._count} entries")
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": self._count,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_embedding_cache():
+    """Process-wide cache shared by ingestion and search."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache()
+        return _default_cache
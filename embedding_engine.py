@@ -0,0 +1,151 @@
+# embedding_engine.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+from openai import APIConnectionError
+from utils import get_env, logger, retry_after_seconds
+
+EMBED_BATCH_SIZE = int(get_env("EMBED_BATCH_SIZE", 256))
+EMBED_BATCH_TOKENS = int(get_env("EMBED_BATCH_TOKENS", 100000))
+EMBED_MAX_ITEM_TOKENS = int(get_env("EMBED_MAX_ITEM_TOKENS", 8000))
+EMBED_CONCURRENCY = int(get_env("EMBED_CONCURRENCY", 4))
+EMBED_MAX_RETRIES = int(get_env("EMBED_MAX_RETRIES", 3))
+
+# Conservative chars-per-token ratio: English prose averages ~4, but dense
+# or non-English text runs closer to 3, and truncation must stay under the
+# model's input limit without pulling in a tokenizer.
+CHARS_PER_TOKEN = 3
+
+
+class EmbeddingError(RuntimeError):
+    pass
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _is_transient(exc):
+    """429s, 5xx, timeouts and dropped connections; anything else will fail again."""
+    if isinstance(exc, (EmbeddingError, APIConnectionError, ConnectionError, TimeoutError)):
+        return True
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status == 429 or (status is not None and status >= 500)
+
+
+class EmbeddingEngine:
+    """
+    Splits embedding inputs into request batches bounded by item count and
+    estimated tokens, runs the batches concurrently and returns vectors in
+    input order. A batch that fails with a transient error is retried on
+    its own; other errors (e.g. a 400 for an oversized input) raise at once.
+
+    With a ``cache`` only texts it has not seen are sent, each at most once
+    per call.
+    """
+
+    def __init__(self, client, model, dims=None, cache=None,
+                 max_batch_items=EMBED_BATCH_SIZE,
+                 max_batch_tokens=EMBED_BATCH_TOKENS,
+                 max_item_tokens=EMBED_MAX_ITEM_TOKENS,
+                 concurrency=EMBED_CONCURRENCY,
+                 max_retries=EMBED_MAX_RETRIES,
+                 backoff=1.0):
+        self.client = client
+        self.model = model
+        self.dims = dims or 0
+        self.cache = cache
+        self.max_batch_items = max(1, max_batch_items)
+        self.max_batch_tokens = max(1, max_batch_tokens)
+        self.max_item_tokens = max(1, max_item_tokens)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max(0, max_retries)
+        self.backoff = backoff
+
+    def _prepare(self, text):
+        text = text or ""
+        if not text.strip():
+            # The API rejects empty strings; picture-only slides still need a vector.
+            return " "
+        max_chars = self.max_item_tokens * CHARS_PER_TOKEN
+        return text[:max_chars]
+
+    def plan_batches(self, texts):
+        """Return lists of input positions, one list per request."""
+        batches, current, current_tokens = [], [], 0
+        for i, text in enumerate(texts):
+            tokens = estimate_tokens(text)
+            if current and (
+                len(current) >= self.max_batch_items
+                or current_tokens + tokens > self.max_batch_tokens
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _embed_batch(self, inputs):
+        attempt = 0
+        while True:
+            try:
+                resp = self.client.embeddings.create(model=self.model, input=inputs)
+                data = sorted(resp.data, key=lambda d: d.index)
+                if len(data) != len(inputs):
+                    raise EmbeddingError(
+                        f"Expected {len(inputs)} embeddings, got {len(data)}"
+                    )
+                return [d.embedding for d in data]
+            except Exception as e:
+                if not _is_transient(e) or attempt >= self.max_retries:
+                    raise
+                delay = retry_after_seconds(e) or self.backoff * (2 ** attempt)
+                attempt += 1
+                logger.warning(
+                    f"Embedding batch of {len(inputs)} failed ({e}); "
+                    f"retry {attempt}/{self.max_retries} in {delay:.1f}s"
+                )
+                time.sleep(delay)
+
+    def embed(self, texts):
+        """Embed ``texts``; raises if any batch still fails after its retries."""
+        if not texts:
+            return []
+        prepared = [self._prepare(t) for t in texts]
+        results = [None] * len(prepared)
+
+        if self.cache is not None:
+            for i, vec in self.cache.get_many(self.model, self.dims, prepared).items():
+                results[i] = vec
+
+        # Identical texts share one request slot.
+        pending = {}
+        for i, text in enumerate(prepared):
+            if results[i] is None:
+                pending.setdefault(text, []).append(i)
+        if not pending:
+            return results
+
+        unique = list(pending)
+        batches = self.plan_batches(unique)
+
+        def run(positions):
+            batch = [unique[i] for i in positions]
+            vectors = self._embed_batch(batch)
+            if self.cache is not None:
+                self.cache.put_many(self.model, self.dims, batch, vectors)
+            for text, vec in zip(batch, vectors):
+                for i in pending[text]:
+                    results[i] = vec
+
+        if len(batches) == 1:
+            run(batches[0])
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as pool:
+                for fut in [pool.submit(run, b) for b in batches]:
+                    fut.result()
+
+        return results
@@ -0,0 +1,122 @@
+# embedding_providers.py
+import re
+import zlib
+import threading
+import numpy as np
+from utils import get_env, logger, get_embedding_dim
+from embedding_engine import EmbeddingEngine
+from embedding_cache import get_embedding_cache
+
+# "azure" (default): Azure OpenAI embeddings deployment.
+# "local": NumPy feature-hashing embedder, no network, sub-millisecond queries.
+EMBEDDING_PROVIDER = get_env("EMBEDDING_PROVIDER", "azure").lower()
+LOCAL_EMBEDDING_DIM = int(get_env("LOCAL_EMBEDDING_DIM", 512))
+
+BASE_COLLECTION = "ppt_slides"
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class AzureEmbeddingProvider:
+    """Azure OpenAI embeddings through the batched, cached EmbeddingEngine."""
+
+    name = "azure"
+
+    def __init__(self, model, dims=None):
+        self.model = model
+        self.model_id = model
+        self.dims = dims or get_embedding_dim(model)
+        self._engine = None
+        self._lock = threading.Lock()
+
+    @property
+    def engine(self):
+        # The client is created on first use, not at import time.
+        with self._lock:
+            if self._engine is None:
+                from openai import AzureOpenAI
+                client = AzureOpenAI(
+                    azure_endpoint=get_env("OPENAI_API_BASE", required=True),
+                    api_key=get_env("OPENAI_API_KEY", required=True),
+                    api_version=get_env("OPENAI_API_VERSION", "2024-05-01-preview")
+                )
+                self._engine = EmbeddingEngine(
+                    client, self.model, dims=self.dims, cache=get_embedding_cache()
+                )
+            return self._engine
+
+    def embed(self, texts):
+        return self.engine.embed(texts)
+
+
+class HashingEmbeddingProvider:
+    """
+    Local embedder: word unigrams and bigrams are hashed (CRC32, stable
+    across processes) into a signed ``dims``-wide vector with sublinear term
+    frequency, then L2-normalised so cosine/L2 rankings behave like TF-IDF
+    overlap. Purely lexical, but needs no network or model files.
+    """
+
+    name = "local"
+
+    def __init__(self, dims=LOCAL_EMBEDDING_DIM):
+        self.dims = dims
+        self.model_id = f"local-hash-{dims}"
+
+    @staticmethod
+    def _features(text):
+        tokens = _TOKEN_RE.findall((text or "").lower())
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def _vector(self, text):
+        features = self._features(text)
+        vec = np.zeros(self.dims, dtype=np.float32)
+        if not features:
+            return vec
+        hashes = np.fromiter(
+            (zlib.crc32(f.encode("utf-8")) for f in features),
+            dtype=np.uint32, count=len(features)
+        )
+        buckets = hashes % self.dims
+        signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+        np.add.at(vec, buckets, signs)
+        # Sublinear tf keeps repeated boilerplate from dominating.
+        vec = np.sign(vec) * np.log1p(np.abs(vec))
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def embed(self, texts):
+        return [self._vector(t).tolist() for t in texts]
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def get_embedding_provider(model=None, provider=None):
+    """
+    Shared provider selected by EMBEDDING_PROVIDER. ``model`` is the Azure
+    deployment name and is ignored by the local provider.
+    """
+    provider = (provider or EMBEDDING_PROVIDER).lower()
+    key = (provider, model if provider == "azure" else None)
+    with _providers_lock:
+        if key not in _providers:
+            if provider == "azure":
+                _providers[key] = AzureEmbeddingProvider(model)
+            elif provider == "local":
+                _providers[key] = HashingEmbeddingProvider()
+            else:
+                raise ValueError(f"Unsupported EMBEDDING_PROVIDER: {provider}")
+            logger.info(f"Embedding provider: {provider} ({_providers[key].model_id})")
+        return _providers[key]
+
+
+def collection_name(provider):
+    """
+    Chroma collection for a provider. Vector sizes differ between
+    providers, so the local embedder gets its own collection.
+    """
+    if provider.name == "azure":
+        return BASE_COLLECTION
+    return f"{BASE_COLLECTION}_{provider.model_id}"
@@ -1,9 +1,7 @@
 # generate_ppt.py
-import os
-import uuid
 from pptx import Presentation
 from pptx.util import Pt
-from utils import logger
+from utils import logger, presentation_buffer
 
 def add_title_slide(prs, title):
     slide = prs.slides.add_slide(prs.slide_layouts[0])
@@ -30,12 +28,13 @@ def add_thankyou(prs):
     slide = prs.slides.add_slide(prs.slide_layouts[5])
     slide.shapes.title.text = "Thank You"
 
-def generate_presentation(payload):
+def generate_presentation(payload, save_to=None):
     """
     payload = {
         "selected_slides": [slide_structs...],
         "answers_map": { slide_index: {shape_id: text} }
     }
+    Returns the deck as a BytesIO; see utils.presentation_buffer for save_to.
     """
 
     selected_slides = payload.get("selected_slides", [])
@@ -82,8 +81,4 @@ def generate_presentation(payload):
     thank_slide.shapes.placeholders[1].text = "Questions?"
 
     # ---------- SAVE ----------
-    os.makedirs("generated", exist_ok=True)
-    out_path = f"generated/ppt_{uuid.uuid4().hex[:6]}.pptx"
-    prs.save(out_path)
-
-    return out_path
\ No newline at end of file
+    return presentation_buffer(prs, save_to, prefix="ppt")
\ No newline at end of file
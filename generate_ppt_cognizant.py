@@ -4,15 +4,15 @@
 # ============================================================
 
 import os
-import uuid
-from datetime import datetime
+import threading
+from io import BytesIO
 from copy import deepcopy
 
 from pptx import Presentation
 from pptx.util import Pt, Inches
 from pptx.dml.color import RGBColor
 
-from utils import logger
+from utils import logger, presentation_buffer
 
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -21,20 +21,81 @@ COGNIZANT_TEMPLATE = os.path.join(TEMPLATES_DIR, "Cognizant.pptx")
 
 
 # ------------------------------------------------------------
-# SLIDE CLONE
+# TEMPLATE SNAPSHOT (prepared once per process)
 # ------------------------------------------------------------
-def clone_slide(prs, slide):
-    new_slide = prs.slides.add_slide(slide.slide_layout)
+class TemplateSnapshot:
+    """
+    The template with every slide removed, saved to bytes, plus the shape
+    trees of the title, content and thank-you master slides and the
+    layout each one uses. A request loads the slide-free skeleton and
+    deep-copies only the shapes it needs, so the full template is parsed
+    and stripped once, not per deck.
+    """
+
+    MASTERS = {"title": 0, "content": 3, "thankyou": -1}
+
+    def __init__(self, path):
+        self.path = path
+        stat = os.stat(path)
+        self.signature = (stat.st_mtime_ns, stat.st_size)
+
+        prs = Presentation(path)
+        layout_refs = {}
+        for m, master in enumerate(prs.slide_masters):
+            for l, layout in enumerate(master.slide_layouts):
+                layout_refs[id(layout.part)] = (m, l)
+
+        self.masters = {}
+        for name, index in self.MASTERS.items():
+            slide = prs.slides[index]
+            self.masters[name] = (
+                layout_refs[id(slide.slide_layout.part)],
+                [deepcopy(shp._element) for shp in slide.shapes],
+            )
+
+        for i in reversed(range(len(prs.slides))):
+            slide_id = prs.slides._sldIdLst[i].rId
+            prs.part.drop_rel(slide_id)
+            del prs.slides._sldIdLst[i]
+
+        buf = BytesIO()
+        prs.save(buf)
+        self.skeleton = buf.getvalue()
+        logger.info(
+            f"Template snapshot ready: {os.path.basename(path)} "
+            f"({len(self.skeleton) / 1e6:.1f} MB skeleton)"
+        )
 
-    for shp in list(new_slide.shapes):
-        new_slide.shapes._spTree.remove(shp._element)
+    def new_presentation(self):
+        return Presentation(BytesIO(self.skeleton))
 
-    for shp in slide.shapes:
-        new_slide.shapes._spTree.insert_element_before(
-            deepcopy(shp._element), 'p:extLst'
-        )
+    def add_slide(self, prs, name):
+        """Append a copy of master slide ``name`` to ``prs``."""
+        (m, l), elements = self.masters[name]
+        new_slide = prs.slides.add_slide(prs.slide_masters[m].slide_layouts[l])
+
+        for shp in list(new_slide.shapes):
+            new_slide.shapes._spTree.remove(shp._element)
+
+        for el in elements:
+            new_slide.shapes._spTree.insert_element_before(deepcopy(el), 'p:extLst')
+
+        return new_slide
 
-    return new_slide
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_template_snapshot(path=COGNIZANT_TEMPLATE):
+    """Shared snapshot, rebuilt if the template file changes on disk."""
+    global _snapshot
+    stat = os.stat(path)
+    with _snapshot_lock:
+        if (_snapshot is None or _snapshot.path != path
+                or _snapshot.signature != (stat.st_mtime_ns, stat.st_size)):
+            _snapshot = TemplateSnapshot(path)
+        return _snapshot
 
 
 # ------------------------------------------------------------
@@ -98,40 +159,29 @@ def fill_content_body(slide, bullets):
 # ------------------------------------------------------------
 # MAIN GENERATOR
 # ------------------------------------------------------------
-def generate_presentation_cognizant(payload):
+def generate_presentation_cognizant(payload, save_to=None):
     slides = payload.get("slides")
     if not slides:
         raise ValueError("No preview slides found")
 
-    prs = Presentation(COGNIZANT_TEMPLATE)
-
-    title_master = prs.slides[0]
-    content_master = prs.slides[3]
-    thankyou_master = prs.slides[-1]
-
-    for i in reversed(range(len(prs.slides))):
-        slide_id = prs.slides._sldIdLst[i].rId
-        prs.part.drop_rel(slide_id)
-        del prs.slides._sldIdLst[i]
+    template = get_template_snapshot()
+    prs = template.new_presentation()
 
     # ---------------- TITLE ----------------
-    title_slide = clone_slide(prs, title_master)
+    title_slide = template.add_slide(prs, "title")
     set_title_white_full_width(prs, title_slide, slides[0]["title"])
 
     # ---------------- CONTENT ----------------
     for slide_data in slides[1:]:
-        slide = clone_slide(prs, content_master)
+        slide = template.add_slide(prs, "content")
 
         set_content_title(slide, slide_data.get("title", ""))
         fill_content_body(slide, slide_data.get("bullets", []))
 
     # ---------------- THANK YOU ----------------
-    thank_slide = clone_slide(prs, thankyou_master)
+    thank_slide = template.add_slide(prs, "thankyou")
     if thank_slide.shapes.title:
         thank_slide.shapes.title.text = "Thank You"
 
     # ---------------- SAVE ----------------
-    os.makedirs("generated", exist_ok=True)
-    out = f"generated/cognizant_{uuid.uuid4().hex[:6]}.pptx"
-    prs.save(out)
-    return out
\ No newline at end of file
+    return presentation_buffer(prs, save_to, prefix="cognizant")
\ No newline at end of file
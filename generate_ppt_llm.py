@@ -1,11 +1,14 @@
 # =============================================
 # generate_ppt_llm.py
 # =============================================
-import os
-import uuid
 from pptx import Presentation
 from pptx.util import Pt
-from utils import text_client, get_env, logger
+from utils import text_client, get_env, logger, presentation_buffer
+from llm_executor import get_llm_executor
+from completion_cache import cached_chat_completion
+
+TITLE_QUESTION = "What should be the title of this presentation?"
+SYNTH_MAX_TOKENS = 500
 
 
 # ------------------------------------------------------------
@@ -75,14 +78,13 @@ Title: <title>
 - bullet
 """
 
-    resp = text_client.chat.completions.create(
+    raw = cached_chat_completion(
+        text_client,
         model=get_env("CHAT_MODEL", required=True),
         messages=[{"role": "user", "content": prompt}],
-        max_tokens=500,
+        max_tokens=SYNTH_MAX_TOKENS,
         temperature=0.7,
-    )
-
-    raw = resp.choices[0].message.content.strip()
+    ).strip()
     lines = [x.strip() for x in raw.split("\n") if x.strip()]
 
     title = "Slide"
@@ -97,10 +99,35 @@ Title: <title>
     return title, bullets
 
 
+def needs_synthesis(user_answers):
+    """True for content slides with at least one non-empty answer."""
+    if TITLE_QUESTION in user_answers:
+        return False
+    return any(v and v.strip() for v in user_answers.values())
+
+
+def _synthesis_cost(user_answers):
+    # Prompt template + Q&A text (~4 chars/token) + completion budget.
+    chars = sum(len(q) + len(a or "") for q, a in user_answers.items())
+    return 200 + chars // 4 + SYNTH_MAX_TOKENS
+
+
+def synthesize_slides_async(answers_list, global_prompt):
+    """
+    Start llm_synthesize_slide for every answers dict concurrently (rate
+    limited); returns Futures in the same order.
+    """
+    return get_llm_executor().map(
+        lambda answers: llm_synthesize_slide(answers, global_prompt),
+        answers_list,
+        cost=_synthesis_cost,
+    )
+
+
 # ============================================================
 # MAIN PPT GENERATOR (PREVIEW-SAFE, FINAL)
 # ============================================================
-def generate_presentation(payload):
+def generate_presentation(payload, save_to=None):
     slides = payload.get("preview_slides") or payload.get("slides", [])
     answers_map = payload.get("answers_map", {})
 
@@ -163,6 +190,18 @@ def generate_presentation(payload):
     # ORIGINAL Q&A → LLM → PPT FLOW (UNCHANGED)
     # ===================================================
     else:
+        # All completions run concurrently; results are consumed in slide order.
+        synth_slides = [
+            str(s["slide_index"]) for s in slides
+            if needs_synthesis(answers_map.get(str(s["slide_index"]), {}))
+        ]
+        synth_futures = dict(zip(
+            synth_slides,
+            synthesize_slides_async(
+                [answers_map[idx] for idx in synth_slides], global_prompt
+            )
+        ))
+
         for slide in slides:
             slide_idx = str(slide["slide_index"])
             slide_title = slide["slide_title"]
@@ -171,10 +210,8 @@ def generate_presentation(payload):
             # -----------------------------
             # CASE 1 — Presentation title slide
             # -----------------------------
-            if "What should be the title of this presentation?" in user_answers:
-                title_text = user_answers[
-                    "What should be the title of this presentation?"
-                ].strip()
+            if TITLE_QUESTION in user_answers:
+                title_text = user_answers[TITLE_QUESTION].strip()
 
                 subtitle = None
                 for v in user_answers.values():
@@ -190,8 +227,7 @@ def generate_presentation(payload):
             # -----------------------------
             # CASE 2 — User skipped answers
             # -----------------------------
-            valid_answers_exist = any(v.strip() for v in user_answers.values())
-            if not valid_answers_exist:
+            if slide_idx not in synth_futures:
                 ppt_slide.shapes.title.text = slide_title
                 continue
 
@@ -199,10 +235,7 @@ def generate_presentation(payload):
             # CASE 3 — Normal LLM generation
             # -----------------------------
             try:
-                _, bullets = llm_synthesize_slide(
-                    user_answers,
-                    global_prompt
-                )
+                _, bullets = synth_futures[slide_idx].result()
             except Exception:
                 logger.exception("LLM failed")
                 bullets = []
@@ -224,9 +257,6 @@ def generate_presentation(payload):
     thanks.shapes.title.text = "Thank You"
 
     # ---------------------------------------------------
-    # SAVE FILE
+    # SAVE (in memory unless save_to is given)
     # ---------------------------------------------------
-    os.makedirs("generated", exist_ok=True)
-    out_path = f"generated/ppt_{uuid.uuid4().hex[:6]}.pptx"
-    prs.save(out_path)
-    return out_path
\ No newline at end of file
+    return presentation_buffer(prs, save_to, prefix="ppt")
\ No newline at end of file
@@ -1,57 +1,72 @@
 import os
-import uuid
-import tempfile
-from pptx import Presentation
-from azure.storage.blob import BlobServiceClient
-from openai import AzureOpenAI
+import time
+import queue
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from blob_clients import get_container_client
 from chromadb import PersistentClient
-from utils import get_env, logger, now_ts, get_embedding_dim
+from utils import get_env, logger, now_ts, slide_record_id, tag_field
+from ingestion_manifest import IngestionManifest, file_sha256
+from embedding_cache import get_embedding_cache
+from embedding_providers import get_embedding_provider, collection_name
+from collection_version import bump_collection_version, get_kb_state, set_kb_state
+from blob_cache import get_source_blob_cache
+from lexical_index import get_lexical_index
+from slide_extractor import extract_slide_texts
 
 # === CONFIG ===
 BLOB_CONN = get_env("AZURE_BLOB_CONN", required=True)
 BLOB_CONTAINER = get_env("AZURE_BLOB_CONTAINER", "ppt-dataset")
 EMBEDDING_MODEL = get_env("EMBEDDING_MODEL", "text-embedding-3-small")
 CHROMA_PERSIST_DIR = get_env("CHROMA_PERSIST_DIR", "./chroma_db")
-
-# === AZURE OPENAI CLIENT ===
-text_client = AzureOpenAI(
-    azure_endpoint=get_env("OPENAI_API_BASE", required=True),
-    api_key=get_env("OPENAI_API_KEY", required=True),
-    api_version=get_env("OPENAI_API_VERSION", "2024-05-01-preview")
+MANIFEST_PATH = get_env(
+    "INGEST_MANIFEST_PATH",
+    os.path.join(CHROMA_PERSIST_DIR, "ingestion_manifest.sqlite3")
 )
 
-# === AZURE BLOB CLIENT ===
-blob_client = BlobServiceClient.from_connection_string(BLOB_CONN)
-container_client = blob_client.get_container_client(BLOB_CONTAINER)
+# === CLIENTS (created on first use) ===
+# Nothing is opened at import time: spawned parse workers re-import this
+# module (as __mp_main__ when it is run as a script) and must stay cheap.
+class IngestionResources:
+    """Blob container, embedder, Chroma collection, manifest and BM25 index."""
+
+    def __init__(self):
+        self.container_client = get_container_client(BLOB_CONTAINER, BLOB_CONN)
+
+        # EMBEDDING_PROVIDER=azure|local
+        self.embedding_provider = get_embedding_provider(EMBEDDING_MODEL)
+        # Manifest entries are per embedder, so switching providers re-indexes.
+        self.embedder_id = self.embedding_provider.model_id
+
+        chroma_client = PersistentClient(path=CHROMA_PERSIST_DIR)
+        name = collection_name(self.embedding_provider)
+        try:
+            self.collection = chroma_client.get_collection(name)
+        except Exception:
+            self.collection = chroma_client.create_collection(name)
+
+        self.manifest = IngestionManifest(MANIFEST_PATH)
+        # Kept in step with the collection.
+        self.lexical_index = get_lexical_index(self.collection.name)
+
+
+_resources = None
+_resources_lock = threading.Lock()
 
-# === CHROMA CLIENT ===
-chroma_client = PersistentClient(path=CHROMA_PERSIST_DIR)
-try:
-    collection = chroma_client.get_collection("ppt_slides")
-except Exception:
-    collection = chroma_client.create_collection("ppt_slides")
 
-EMBEDDING_DIM = get_embedding_dim(EMBEDDING_MODEL)
+def get_ingestion_resources():
+    global _resources
+    with _resources_lock:
+        if _resources is None:
+            _resources = IngestionResources()
+        return _resources
+
 
 # -------------------------------------------------
 # FUNCTIONS
 # -------------------------------------------------
-def extract_slides(local_path):
-    """Extract text content from all slides in a PPT."""
-    prs = Presentation(local_path)
-    slides = []
-    for i, slide in enumerate(prs.slides):
-        texts = []
-        for shape in slide.shapes:
-            if hasattr(shape, "text") and shape.text and shape.text.strip():
-                texts.append(shape.text.strip())
-        slides.append({
-            "index": i,
-            "text": "\n".join(texts)
-        })
-    return slides
-
-
 def simple_tagger(text):
     text_l = text.lower()
     tags = set()
@@ -70,48 +85,28 @@ def simple_tagger(text):
     return list(tags) or ["General"]
 
 
-def ppt_already_indexed(ppt_name):
-    try:
-        res = collection.query(where={"ppt_name": ppt_name}, n_results=1)
-        return bool(res.get("ids", [[]])[0])
-    except Exception:
-        return False
+def tag_metadata(tags):
+    """
+    Slide tag metadata: the display string plus one boolean field per tag,
+    so searches can AND/OR tags inside the Chroma query.
+    """
+    meta = {"tags": ", ".join(tags)}
+    meta.update({tag_field(t): True for t in tags})
+    return meta
 
 
-def azure_embed_func(texts):
+def embed_func(texts):
+    kb = get_ingestion_resources()
     try:
-        resp = text_client.embeddings.create(
-            model=EMBEDDING_MODEL,
-            input=texts
-        )
-        return [d.embedding for d in resp.data]
+        return kb.embedding_provider.embed(texts)
     except Exception as e:
         logger.exception(f"Embedding failed: {e}")
         return []
 
 
-def process_blob(blob_name):
-    logger.info(f"Processing blob: {blob_name}")
-
-    tmp_path = os.path.join(
-        tempfile.gettempdir(),
-        blob_name.replace("/", "_")
-    )
-
-    with open(tmp_path, "wb") as fp:
-        stream = container_client.download_blob(blob_name)
-        stream.readinto(fp)
-
-    slides = extract_slides(tmp_path)
-    if not slides:
-        logger.warning(f"No slides found in {blob_name}")
-        return
-
-    if ppt_already_indexed(blob_name):
-        logger.info(f"Skipping '{blob_name}' — already indexed.")
-        return
-
-    docs, metadatas, ids, texts = [], [], [], []
+def build_slide_records(blob_name, slides):
+    """Build the Chroma documents, metadatas and ids for a parsed deck."""
+    docs, metadatas, ids = [], [], []
     ppt_base = os.path.splitext(os.path.basename(blob_name))[0]
 
     for s in slides:
@@ -128,52 +123,477 @@ def process_blob(blob_name):
             "title": text.split("\n", 1)[0] if text else "",
 
             # 🔍 Optional helpers
-            "tags": ", ".join(simple_tagger(text)),   # ✅ LIST (FIX)
+            **tag_metadata(sorted(simple_tagger(text))),
             "indexed_on": str(now_ts())
         }
 
-        ids.append(str(uuid.uuid4()))
+        ids.append(slide_record_id(blob_name, slide_index))
         docs.append(text)
         metadatas.append(metadata)
-        texts.append(text)
 
-    embeddings = azure_embed_func(texts)
+    return docs, metadatas, ids
+
+
+def _fetch_local(blob_name, blob_props):
+    """Local copy via the shared blob cache; the listing ETag avoids a round trip on hits."""
+    etag = blob_props.get("etag") if isinstance(blob_props, dict) else getattr(blob_props, "etag", None)
+    return get_source_blob_cache().fetch(blob_name, etag=etag)
+
+
+def _get_blob_props(blob_name):
+    kb = get_ingestion_resources()
+    return kb.container_client.get_blob_client(blob_name).get_blob_properties()
+
+
+def _check_manifest(blob_name, blob_props):
+    """
+    Download a blob unless the manifest shows it is unchanged.
+    Returns (local_path, content_hash), or None when the blob can be skipped.
+    """
+    kb = get_ingestion_resources()
+    if kb.manifest.is_current(blob_name, blob_props, kb.embedder_id):
+        logger.info(f"Skipping '{blob_name}' — unchanged since last index.")
+        return None
+
+    tmp_path = _fetch_local(blob_name, blob_props)
+    content_hash = file_sha256(tmp_path)
+
+    if kb.manifest.has_content(blob_name, content_hash, kb.embedder_id):
+        # Same bytes under a new ETag: refresh the fingerprint, keep the vectors.
+        entry = kb.manifest.get(blob_name)
+        kb.manifest.record(blob_name, blob_props, content_hash,
+                           entry["slide_count"], kb.embedder_id)
+        logger.info(f"Skipping '{blob_name}' — content unchanged.")
+        return None
+
+    return tmp_path, content_hash
+
+
+def _trim_stale_rows(blob_name, keep_ids):
+    """
+    Delete a deck's rows that were not rewritten by the latest upsert:
+    slides past the new end of a shrunken deck, and rows indexed under
+    random ids before ids were made deterministic.
+    Returns the number of rows removed.
+    """
+    kb = get_ingestion_resources()
+    existing = kb.collection.get(where={"ppt_name": blob_name}, include=[]).get("ids", [])
+    keep = set(keep_ids)
+    stale = [i for i in existing if i not in keep]
+    if stale:
+        kb.collection.delete(ids=stale)
+        kb.lexical_index.delete(ids=stale)
+        logger.info(f"Removed {len(stale)} stale index rows for {blob_name}")
+    return len(stale)
+
+
+def process_blob(blob_name, blob_props=None, progress=None):
+    """
+    Index one deck. ``progress(fraction, message)`` is called as each
+    stage finishes, e.g. by a background job reporting to the UI.
+    """
+    kb = get_ingestion_resources()
+    logger.info(f"Processing blob: {blob_name}")
+    report = progress or (lambda fraction, message: None)
+
+    if blob_props is None:
+        blob_props = _get_blob_props(blob_name)
+
+    fetched = _check_manifest(blob_name, blob_props)
+    if fetched is None:
+        report(1.0, "Unchanged since last index")
+        return
+    tmp_path, content_hash = fetched
+    report(0.25, "Downloaded")
+
+    slides = extract_slide_texts(tmp_path)
+    if not slides:
+        logger.warning(f"No slides found in {blob_name}")
+        if _trim_stale_rows(blob_name, []):
+            bump_collection_version()
+        kb.manifest.record(blob_name, blob_props, content_hash, 0, kb.embedder_id)
+        return
+
+    docs, metadatas, ids = build_slide_records(blob_name, slides)
+    report(0.4, f"Parsed {len(docs)} slides")
+
+    embeddings = embed_func(docs)
     if not embeddings or len(embeddings) != len(docs):
         logger.error("Embedding failed or mismatch; aborting.")
         return
+    report(0.8, "Embedded")
 
     try:
-        collection.add(
+        kb.collection.upsert(
             documents=docs,
             embeddings=embeddings,
             metadatas=metadatas,
             ids=ids
         )
+        kb.lexical_index.upsert(ids, docs, metadatas)
+        _trim_stale_rows(blob_name, ids)
+        kb.manifest.record(blob_name, blob_props, content_hash, len(docs), kb.embedder_id)
+        bump_collection_version()
+        report(1.0, f"Indexed {len(docs)} slides")
         logger.info(f"Indexed {len(docs)} slides from {blob_name}")
     except Exception as e:
         logger.exception(f"Failed to insert slides from {blob_name}: {e}")
 
 
 def delete_ppt_from_chroma(ppt_name: str) -> None:
+    kb = get_ingestion_resources()
     logger.info(f"Deleting Chroma indexes for PPT: {ppt_name}")
     try:
-        collection.delete(where={"ppt_name": ppt_name})
+        kb.collection.delete(where={"ppt_name": ppt_name})
+        kb.lexical_index.delete(ppt_name=ppt_name)
+        kb.manifest.remove(ppt_name)
+        bump_collection_version()
         logger.info(f"Deleted Chroma indexes for PPT: {ppt_name}")
     except Exception as e:
         logger.exception("Delete failed")
         raise e
 
 
-def main():
-    logger.info("Starting ingestion into Chroma...")
-    for b in container_client.list_blobs():
-        if b.name.lower().endswith((".pptx", ".ppt")):
+# -------------------------------------------------
+# PIPELINED INGESTION
+# -------------------------------------------------
+DEFAULT_WORKERS = int(get_env("INGEST_WORKERS", 8))
+DEFAULT_BATCH_SIZE = int(get_env("INGEST_BATCH_SIZE", 256))
+
+_STOP = object()
+
+
+class StageStats:
+    """Thread-safe counters for one pipeline stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def record(self, started, items=1, error=False):
+        ended = time.perf_counter()
+        with self._lock:
+            if self.started is None or started < self.started:
+                self.started = started
+            if self.finished is None or ended > self.finished:
+                self.finished = ended
+            self.busy += ended - started
+            if error:
+                self.errors += 1
+            else:
+                self.items += items
+
+    def summary(self):
+        wall = (self.finished - self.started) if self.started is not None else 0.0
+        rate = self.items / wall if wall > 0 else 0.0
+        return (
+            f"{self.name:<9} {self.items:>7} items | wall {wall:8.2f}s | "
+            f"busy {self.busy:8.2f}s | {rate:8.2f}/s | errors {self.errors}"
+        )
+
+
+def _run_workers(count, target, *args):
+    threads = [
+        threading.Thread(target=target, args=args, daemon=True)
+        for _ in range(count)
+    ]
+    for t in threads:
+        t.start()
+    return threads
+
+
+def _close_stage(threads, out_q, consumers=1):
+    """Wait for a stage's workers, then signal the next stage to stop."""
+    for t in threads:
+        t.join()
+    for _ in range(consumers):
+        out_q.put(_STOP)
+
+
+def _new_batch():
+    return {"decks": [], "docs": [], "metadatas": [], "ids": []}
+
+
+def run_pipeline(blobs, workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Ingest blob listing entries through bounded stages joined by
+    backpressured queues:
+
+        download (threads) -> parse (process pool) -> batch -> embed (threads) -> write (single thread)
+
+    Each queue holds at most a few items per worker, so a slow stage throttles
+    the stages before it instead of buffering the whole container in memory.
+    """
+    kb = get_ingestion_resources()
+    workers = max(1, workers)
+    batch_size = max(1, batch_size)
+    parse_workers = min(workers, os.cpu_count() or 1)
+    embed_workers = max(1, workers // 2)
+
+    download_q = queue.Queue(maxsize=workers * 2)
+    parse_q = queue.Queue(maxsize=parse_workers * 2)
+    deck_q = queue.Queue(maxsize=embed_workers * 2)
+    batch_q = queue.Queue(maxsize=embed_workers * 2)
+    write_q = queue.Queue(maxsize=embed_workers * 2)
+
+    stats = {
+        name: StageStats(name)
+        for name in ("download", "parse", "embed", "write")
+    }
+
+    def download_worker():
+        while True:
+            blob_props = download_q.get()
+            if blob_props is _STOP:
+                return
+            blob_name = blob_props.name
+            started = time.perf_counter()
+            try:
+                fetched = _check_manifest(blob_name, blob_props)
+                stats["download"].record(started, items=1 if fetched else 0)
+                if fetched is None:
+                    skipped.append(blob_name)
+                    continue
+                parse_q.put((blob_name, blob_props) + fetched)
+            except Exception as e:
+                stats["download"].record(started, error=True)
+                logger.exception(f"Download failed for {blob_name}: {e}")
+
+    def parse_worker(pool):
+        while True:
+            item = parse_q.get()
+            if item is _STOP:
+                return
+            blob_name, blob_props, local_path, content_hash = item
+            started = time.perf_counter()
             try:
-                process_blob(b.name)
+                slides = pool.submit(extract_slide_texts, local_path).result()
+                stats["parse"].record(started)
+                if not slides:
+                    logger.warning(f"No slides found in {blob_name}")
+                deck = (blob_name, blob_props, content_hash, len(slides))
+                deck_q.put((deck, build_slide_records(blob_name, slides)))
             except Exception as e:
-                logger.exception(f"Failed to process {b.name}: {e}")
+                stats["parse"].record(started, error=True)
+                logger.exception(f"Parse failed for {blob_name}: {e}")
+
+    def batcher():
+        # Whole decks are kept together so a failed batch never leaves a
+        # deck half-indexed.
+        pending = _new_batch()
+        stopped = 0
+        while stopped < parse_workers:
+            item = deck_q.get()
+            if item is _STOP:
+                stopped += 1
+                continue
+            deck, (docs, metadatas, ids) = item
+            pending["decks"].append(deck)
+            pending["docs"].extend(docs)
+            pending["metadatas"].extend(metadatas)
+            pending["ids"].extend(ids)
+            if len(pending["docs"]) >= batch_size:
+                batch_q.put(pending)
+                pending = _new_batch()
+        if pending["decks"]:
+            batch_q.put(pending)
+
+    def embed_worker():
+        while True:
+            batch = batch_q.get()
+            if batch is _STOP:
+                return
+            docs = batch["docs"]
+            started = time.perf_counter()
+            embeddings = embed_func(docs) if docs else []
+            if len(embeddings) != len(docs):
+                stats["embed"].record(started, error=True)
+                logger.error(f"Embedding failed or mismatch for batch of {len(docs)}; dropping.")
+                continue
+            stats["embed"].record(started, items=len(docs))
+            batch["embeddings"] = embeddings
+            write_q.put(batch)
+
+    def writer():
+        stopped = 0
+        while stopped < embed_workers:
+            batch = write_q.get()
+            if batch is _STOP:
+                stopped += 1
+                continue
+            docs = batch["docs"]
+            started = time.perf_counter()
+            try:
+                if docs:
+                    kb.collection.upsert(
+                        documents=docs,
+                        embeddings=batch["embeddings"],
+                        metadatas=batch["metadatas"],
+                        ids=batch["ids"]
+                    )
+                    kb.lexical_index.upsert(batch["ids"], docs, batch["metadatas"])
+                removed = 0
+                for blob_name, blob_props, content_hash, slide_count in batch["decks"]:
+                    removed += _trim_stale_rows(
+                        blob_name,
+                        [slide_record_id(blob_name, i) for i in range(slide_count)]
+                    )
+                    kb.manifest.record(blob_name, blob_props, content_hash,
+                                       slide_count, kb.embedder_id)
+                if docs or removed:
+                    bump_collection_version()
+                stats["write"].record(started, items=len(docs))
+            except Exception as e:
+                stats["write"].record(started, error=True)
+                logger.exception(f"Failed to insert batch of {len(docs)} slides: {e}")
+
+    wall_start = time.perf_counter()
+    listed = 0
+    skipped = []
+
+    # Spawned, not forked: the download/embed threads (and the Azure and
+    # logging locks they hold) are already live when workers start.
+    with ProcessPoolExecutor(
+        max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        download_threads = _run_workers(workers, download_worker)
+        parse_threads = _run_workers(parse_workers, parse_worker, pool)
+        batch_thread = _run_workers(1, batcher)
+        embed_threads = _run_workers(embed_workers, embed_worker)
+        writer_thread = _run_workers(1, writer)
+
+        for blob_props in blobs:
+            download_q.put(blob_props)
+            listed += 1
+        for _ in range(workers):
+            download_q.put(_STOP)
+
+        _close_stage(download_threads, parse_q, parse_workers)
+        _close_stage(parse_threads, deck_q, parse_workers)
+        _close_stage(batch_thread, batch_q, embed_workers)
+        _close_stage(embed_threads, write_q, embed_workers)
+        for t in writer_thread:
+            t.join()
+
+    wall = time.perf_counter() - wall_start
+    logger.info(
+        f"Pipeline finished: {listed} blobs listed, {len(skipped)} unchanged, in {wall:.2f}s "
+        f"(workers={workers}, parse_workers={parse_workers}, "
+        f"embed_workers={embed_workers}, batch_size={batch_size})"
+    )
+    for stage in stats.values():
+        logger.info(stage.summary())
+    logger.info(f"Embedding cache: {get_embedding_cache().stats()}")
+    return stats
+
+
+def _list_ppt_blobs():
+    kb = get_ingestion_resources()
+    for b in kb.container_client.list_blobs():
+        if b.name.lower().endswith((".pptx", ".ppt")):
+            yield b
+
+
+def sync_lexical_index(force=False):
+    """
+    Backfill the BM25 index from the collection once per collection (slides
+    indexed before it existed are skipped by the manifest), or when forced.
+    A kb_state flag marks the backfill done; a non-empty index is not proof,
+    since decks uploaded before the first sync write rows of their own.
+    """
+    kb = get_ingestion_resources()
+    flag = f"lexical_backfilled:{kb.collection.name}"
+    if not force and get_kb_state(flag):
+        return 0
+    if force:
+        kb.lexical_index.clear()
+    count = kb.lexical_index.rebuild_from_collection(kb.collection)
+    set_kb_state(flag, 1)
+    if count:
+        bump_collection_version()
+    return count
+
+
+def sync_tag_metadata(page_size=1000):
+    """
+    Add per-tag boolean fields to rows indexed when tags were only stored
+    as a comma-joined string. Runs once per collection; a kb_state flag
+    skips the scan afterwards. Returns the number of rows updated.
+    """
+    kb = get_ingestion_resources()
+    flag = f"tag_fields_migrated:{kb.collection.name}"
+    if get_kb_state(flag):
+        return 0
+    offset, updated = 0, 0
+    while True:
+        res = kb.collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        ids = res.get("ids") or []
+        if not ids:
+            break
+        stale_ids, stale_metas = [], []
+        for row_id, meta in zip(ids, res.get("metadatas") or []):
+            if not meta or any(k.startswith("tag_") for k in meta):
+                continue
+            tags = [t.strip() for t in (meta.get("tags") or "").split(",") if t.strip()]
+            stale_ids.append(row_id)
+            stale_metas.append({**meta, **tag_metadata(tags or ["General"])})
+        if stale_ids:
+            kb.collection.update(ids=stale_ids, metadatas=stale_metas)
+            updated += len(stale_ids)
+        offset += len(ids)
+    if updated:
+        logger.info(f"Added tag fields to {updated} existing slides")
+        bump_collection_version()
+    set_kb_state(flag, 1)
+    return updated
+
+
+def main(workers=None, batch_size=DEFAULT_BATCH_SIZE, rebuild_lexical=False):
+    """
+    Ingest every PPT in the source container.
+    With ``workers`` set, blobs go through the staged pipeline; otherwise
+    they are processed one at a time with ``process_blob``.
+    """
+    logger.info("Starting ingestion into Chroma...")
+    sync_lexical_index(force=rebuild_lexical)
+    sync_tag_metadata()
+    if workers:
+        run_pipeline(_list_ppt_blobs(), workers=workers, batch_size=batch_size)
+        logger.info("Ingestion complete.")
+        return
+
+    for b in _list_ppt_blobs():
+        try:
+            process_blob(b.name, b)
+        except Exception as e:
+            logger.exception(f"Failed to process {b.name}: {e}")
     logger.info("Ingestion complete.")
 
 
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Index source PPTs into Chroma.")
+    parser.add_argument(
+        "--workers", type=int, default=DEFAULT_WORKERS,
+        help="Pipeline concurrency (download threads, parse processes, embed workers). "
+             "Use 0 for the sequential one-deck-at-a-time loop."
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+        help="Slides per embedding/Chroma write batch."
+    )
+    parser.add_argument(
+        "--rebuild-lexical", action="store_true",
+        help="Rebuild the BM25 index from the Chroma collection before ingesting."
+    )
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = _parse_args()
+    main(workers=args.workers, batch_size=args.batch_size,
+         rebuild_lexical=args.rebuild_lexical)
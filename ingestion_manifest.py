@@ -0,0 +1,119 @@
+# ingestion_manifest.py
+import hashlib
+import threading
+from utils import open_sqlite, now_ts, logger
+
+
+def _props_value(props, name):
+    if isinstance(props, dict):
+        return props.get(name)
+    return getattr(props, name, None)
+
+
+def blob_fingerprint(props):
+    """
+    (etag, last_modified) for a blob listing entry or BlobProperties.
+    Both come back in list_blobs(), so no extra request is needed.
+    """
+    etag = _props_value(props, "etag")
+    last_modified = _props_value(props, "last_modified")
+    return (
+        str(etag).strip('"') if etag else None,
+        last_modified.isoformat() if hasattr(last_modified, "isoformat") else last_modified,
+    )
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    h = hashlib.sha256()
+    with open(path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class IngestionManifest:
+    """
+    Persistent record of what has been indexed, one row per source blob.
+
+    Lets ingestion decide from listing metadata alone (ETag / last-modified)
+    whether a blob needs to be downloaded at all.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(path)
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ingestion_manifest (
+                    blob_name       TEXT PRIMARY KEY,
+                    etag            TEXT,
+                    last_modified   TEXT,
+                    content_hash    TEXT,
+                    slide_count     INTEGER,
+                    embedding_model TEXT,
+                    indexed_on      TEXT
+                )
+                """
+            )
+
+    def get(self, blob_name):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT blob_name, etag, last_modified, content_hash, slide_count, "
+                "embedding_model, indexed_on FROM ingestion_manifest WHERE blob_name = ?",
+                (blob_name,),
+            ).fetchone()
+        if not row:
+            return None
+        keys = ("blob_name", "etag", "last_modified", "content_hash",
+                "slide_count", "embedding_model", "indexed_on")
+        return dict(zip(keys, row))
+
+    def is_current(self, blob_name, props, embedding_model):
+        """True when the blob is unchanged since it was last indexed with this model."""
+        entry = self.get(blob_name)
+        if not entry or entry["embedding_model"] != embedding_model:
+            return False
+        etag, last_modified = blob_fingerprint(props)
+        if etag:
+            return entry["etag"] == etag
+        return bool(last_modified) and entry["last_modified"] == last_modified
+
+    def has_content(self, blob_name, content_hash, embedding_model):
+        """True when the stored content hash matches (e.g. blob rewritten with identical bytes)."""
+        entry = self.get(blob_name)
+        return bool(
+            entry
+            and entry["embedding_model"] == embedding_model
+            and entry["content_hash"] == content_hash
+        )
+
+    def record(self, blob_name, props, content_hash, slide_count, embedding_model):
+        etag, last_modified = blob_fingerprint(props)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO ingestion_manifest
+                    (blob_name, etag, last_modified, content_hash, slide_count,
+                     embedding_model, indexed_on)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(blob_name) DO UPDATE SET
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    content_hash = excluded.content_hash,
+                    slide_count = excluded.slide_count,
+                    embedding_model = excluded.embedding_model,
+                    indexed_on = excluded.indexed_on
+                """,
+                (blob_name, etag, last_modified, content_hash, slide_count,
+                 embedding_model, now_ts()),
+            )
+
+    def remove(self, blob_name):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM ingestion_manifest WHERE blob_name = ?", (blob_name,)
+            )
+        logger.info(f"Removed manifest entry for {blob_name}")
@@ -0,0 +1,429 @@
+# job_queue.py
+import os
+import re
+import json
+import time
+import uuid
+import hashlib
+import tempfile
+import threading
+from utils import get_env, logger, open_sqlite, ensure_dir
+
+JOB_QUEUE_PATH = get_env(
+    "JOB_QUEUE_PATH",
+    os.path.join(get_env("CHROMA_PERSIST_DIR", "./chroma_db"), "jobs.sqlite3")
+)
+JOB_WORKERS = int(get_env("JOB_WORKERS", 2))
+JOB_STAGING_DIR = get_env("JOB_STAGING_DIR", os.path.join("generated", "staging"))
+# Finished jobs are purged after this long.
+JOB_RETENTION_SECONDS = int(get_env("JOB_RETENTION_SECONDS", 7 * 24 * 3600))
+
+ACTIVE = ("queued", "running")
+
+_COLUMNS = (
+    "id", "kind", "dedupe_key", "owner", "status", "progress", "message",
+    "params", "result", "error", "cancel_requested",
+    "created_at", "started_at", "finished_at",
+)
+
+
+class JobCancelled(BaseException):
+    """
+    Raised inside a handler when its job has been cancelled. A BaseException,
+    so the broad ``except Exception`` blocks in handler code (e.g. around
+    ``process_blob``'s progress callback) cannot swallow it.
+    """
+
+
+def job_dedupe_key(kind, params):
+    raw = json.dumps({"kind": kind, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class JobContext:
+    """Handed to handlers: progress reporting and cooperative cancellation."""
+
+    def __init__(self, queue, job_id):
+        self.queue = queue
+        self.job_id = job_id
+
+    def progress(self, fraction, message=None):
+        self.queue._update(self.job_id, progress=max(0.0, min(1.0, float(fraction))), message=message)
+        self.check_cancelled()
+
+    @property
+    def cancelled(self):
+        job = self.queue.get(self.job_id)
+        return bool(job and job["cancel_requested"])
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled(self.job_id)
+
+
+class JobQueue:
+    """
+    Local job queue: jobs live in SQLite, a pool of worker threads runs
+    them, and Streamlit pages submit and poll by job id, so work survives
+    reruns and browser refreshes.
+
+    Identical jobs (same kind and params) that are queued, running or,
+    unless ``reuse_succeeded=False``, succeeded are shared instead of
+    repeated; every submitting owner is recorded as a subscriber, and a
+    shared job is only cancelled once all of them have cancelled. Workers
+    pick the oldest job of the subscriber with the fewest running jobs, so
+    one user's long batch does not starve everyone else. Handlers cancel
+    cooperatively via ``JobContext.progress`` / ``check_cancelled``.
+    """
+
+    def __init__(self, path=JOB_QUEUE_PATH, workers=JOB_WORKERS):
+        self.path = path
+        self.workers = max(1, workers)
+        self._handlers = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._threads = []
+        self._conn = open_sqlite(path)
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id               TEXT PRIMARY KEY,
+                    kind             TEXT NOT NULL,
+                    dedupe_key       TEXT NOT NULL,
+                    owner            TEXT,
+                    status           TEXT NOT NULL,
+                    progress         REAL NOT NULL DEFAULT 0,
+                    message          TEXT,
+                    params           TEXT NOT NULL,
+                    result           TEXT,
+                    error            TEXT,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    created_at       REAL NOT NULL,
+                    started_at       REAL,
+                    finished_at      REAL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs(dedupe_key, status)")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_subscribers (
+                    job_id TEXT NOT NULL,
+                    owner  TEXT NOT NULL,
+                    PRIMARY KEY (job_id, owner)
+                )
+                """
+            )
+            # Jobs queued before subscribers were tracked belong to their submitter.
+            self._conn.execute(
+                "INSERT OR IGNORE INTO job_subscribers (job_id, owner) "
+                "SELECT id, COALESCE(owner, '') FROM jobs WHERE status IN ('queued', 'running')"
+            )
+            # Jobs left running by a previous process are picked up again.
+            self._conn.execute(
+                "UPDATE jobs SET status = 'queued', progress = 0, message = 'Requeued after restart' "
+                "WHERE status = 'running'"
+            )
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed', 'cancelled') AND finished_at < ?",
+                (time.time() - JOB_RETENTION_SECONDS,),
+            )
+            self._conn.execute(
+                "DELETE FROM job_subscribers WHERE job_id NOT IN (SELECT id FROM jobs)"
+            )
+
+    # ---------- handlers / workers ----------
+    def register(self, kind, handler):
+        """``handler(ctx, **params)`` returns a JSON-serializable result."""
+        self._handlers[kind] = handler
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+        logger.info(f"Job queue started with {self.workers} workers ({self.path})")
+
+    def _worker(self):
+        while True:
+            try:
+                job = self._claim_next()
+                if job is None:
+                    with self._wakeup:
+                        self._wakeup.wait(timeout=1.0)
+                    continue
+                self._run(job)
+            except Exception:
+                # e.g. a transient "database is locked": keep the worker alive.
+                logger.exception("Job worker error; retrying shortly")
+                time.sleep(1.0)
+
+    def _claim_next(self):
+        with self._lock:
+            queued = self._conn.execute(
+                "SELECT j.id, GROUP_CONCAT(s.owner, char(31)) FROM jobs j "
+                "LEFT JOIN job_subscribers s ON s.job_id = j.id "
+                "WHERE j.status = 'queued' AND j.kind IN (%s) "
+                "GROUP BY j.id ORDER BY j.created_at" % ",".join("?" * len(self._handlers)),
+                list(self._handlers),
+            ).fetchall() if self._handlers else []
+            if not queued:
+                return None
+            running = dict(self._conn.execute(
+                "SELECT s.owner, COUNT(*) FROM jobs j "
+                "JOIN job_subscribers s ON s.job_id = j.id "
+                "WHERE j.status = 'running' GROUP BY s.owner"
+            ).fetchall())
+
+            # Fair share: a shared job counts against every subscriber and is
+            # ranked by its least-served one; ties go by submission order.
+            def share(entry):
+                position, (_, owners) = entry
+                loads = [running.get(o, 0) for o in (owners or "").split("\x1f")]
+                return min(loads), position
+
+            job_id = min(enumerate(queued), key=share)[1][0]
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, message = 'Started' "
+                    "WHERE id = ? AND status = 'queued'",
+                    (time.time(), job_id),
+                )
+        return self.get(job_id)
+
+    def _run(self, job):
+        ctx = JobContext(self, job["id"])
+        try:
+            ctx.check_cancelled()
+            result = self._handlers[job["kind"]](ctx, **job["params"])
+            self._finish(job["id"], "succeeded", result=result, progress=1.0, message="Done")
+        except JobCancelled:
+            self._finish(job["id"], "cancelled", message="Cancelled")
+        except Exception as e:
+            logger.exception(f"Job {job['id']} ({job['kind']}) failed")
+            self._finish(job["id"], "failed", error=str(e), message="Failed")
+
+    # ---------- persistence ----------
+    def _update(self, job_id, **fields):
+        fields = {k: v for k, v in fields.items() if v is not None}
+        if not fields:
+            return
+        assignments = ", ".join(f"{k} = ?" for k in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id)
+            )
+
+    def _finish(self, job_id, status, result=None, error=None, progress=None, message=None):
+        self._update(
+            job_id, status=status, progress=progress, message=message, error=error,
+            result=json.dumps(result, default=str) if result is not None else None,
+            finished_at=time.time(),
+        )
+
+    def _row_to_job(self, row):
+        job = dict(zip(_COLUMNS, row))
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    # ---------- public API ----------
+    def submit(self, kind, params, owner=None, dedupe=True, reuse_succeeded=True):
+        """
+        Queue a job and return its id. With ``dedupe``, an identical job that
+        is queued or running (or has succeeded, with ``reuse_succeeded``) is
+        returned instead, and ``owner`` is subscribed to it.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind: {kind}")
+        key = job_dedupe_key(kind, params)
+        statuses = ACTIVE + (("succeeded",) if reuse_succeeded else ())
+        with self._lock, self._conn:
+            row = None
+            if dedupe:
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE dedupe_key = ? AND status IN (%s) "
+                    "AND cancel_requested = 0 ORDER BY created_at DESC LIMIT 1" % ",".join("?" * len(statuses)),
+                    (key, *statuses),
+                ).fetchone()
+            if row:
+                job_id = row[0]
+            else:
+                job_id = uuid.uuid4().hex
+                self._conn.execute(
+                    "INSERT INTO jobs (id, kind, dedupe_key, owner, status, params, created_at, message) "
+                    "VALUES (?, ?, ?, ?, 'queued', ?, ?, 'Queued')",
+                    (job_id, kind, key, owner, json.dumps(params, default=str), time.time()),
+                )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO job_subscribers (job_id, owner) VALUES (?, ?)",
+                (job_id, owner or ""),
+            )
+            if row:
+                return job_id
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list(self, owner=None, kind=None, statuses=None, limit=50):
+        clauses, args = [], []
+        if owner is not None:
+            clauses.append("id IN (SELECT job_id FROM job_subscribers WHERE owner = ?)")
+            args.append(owner)
+        if kind is not None:
+            clauses.append("kind = ?")
+            args.append(kind)
+        if statuses:
+            clauses.append(f"status IN ({','.join('?' * len(statuses))})")
+            args.extend(statuses)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs {where} ORDER BY created_at DESC LIMIT ?",
+                (*args, -1 if limit is None else limit),
+            ).fetchall()
+        return [self._row_to_job(r) for r in rows]
+
+    def cancel(self, job_id, owner=None):
+        """
+        Drop ``owner``'s subscription to a job; once no subscribers remain (or
+        with no ``owner``), cancel it if queued, or ask it to stop at its next
+        checkpoint if running. Returns False while other subscribers still want it.
+        """
+        with self._lock, self._conn:
+            if owner is not None:
+                self._conn.execute(
+                    "DELETE FROM job_subscribers WHERE job_id = ? AND owner = ?", (job_id, owner)
+                )
+                remaining = self._conn.execute(
+                    "SELECT COUNT(*) FROM job_subscribers WHERE job_id = ?", (job_id,)
+                ).fetchone()[0]
+                if remaining:
+                    return False
+            self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', message = 'Cancelled', finished_at = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id),
+            )
+            self._conn.execute(
+                "UPDATE jobs SET cancel_requested = 1, message = 'Cancelling...' "
+                "WHERE id = ? AND status = 'running'",
+                (job_id,),
+            )
+        return True
+
+
+# ------------------------------------------------------------
+# BUILT-IN JOBS
+# ------------------------------------------------------------
+# Held while staging + submitting and while releasing a staged file, so a
+# finishing job never deletes a file another upload has just queued.
+_staging_lock = threading.Lock()
+
+
+def stage_upload(data, blob_name):
+    """Write uploaded bytes to the staging dir so a job can pick them up."""
+    ensure_dir(JOB_STAGING_DIR)
+    digest = hashlib.sha256(data).hexdigest()
+    safe_name = re.sub(r"[^\w.-]+", "_", blob_name)
+    path = os.path.join(JOB_STAGING_DIR, f"{digest[:16]}_{safe_name}")
+    if not os.path.exists(path):
+        fd, tmp = tempfile.mkstemp(dir=JOB_STAGING_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(data)
+        os.replace(tmp, path)
+    return path, digest
+
+
+def submit_ingest(queue, data, blob_name, owner=None):
+    """Stage an uploaded deck and queue its ingest job; returns the job id."""
+    with _staging_lock:
+        staged_path, digest = stage_upload(data, blob_name)
+        return queue.submit(
+            "ingest",
+            {"blob_name": blob_name, "staged_path": staged_path, "content_hash": digest},
+            owner=owner,
+            # A re-upload should re-index, not return the earlier result.
+            reuse_succeeded=False,
+        )
+
+
+def _release_staged(queue, job_id, staged_path):
+    """Delete a staged file once no other queued or running job needs it."""
+    with _staging_lock:
+        for job in queue.list(kind="ingest", statuses=ACTIVE, limit=None):
+            if job["id"] != job_id and job["params"].get("staged_path") == staged_path:
+                return
+        try:
+            os.remove(staged_path)
+        except FileNotFoundError:
+            pass
+
+
+def ingest_job(ctx, blob_name, staged_path, content_hash=None):
+    """Upload a staged deck to the dataset container and index it."""
+    from azure_blob_utils import upload_source_ppt_to_blob
+    from ingestion_chroma import process_blob
+
+    try:
+        with open(staged_path, "rb") as fp:
+            upload_source_ppt_to_blob(fp.read(), blob_name)
+        ctx.progress(0.2, "Uploaded")
+
+        last = {"fraction": 0.0}
+
+        def report(fraction, message):
+            last["fraction"] = fraction
+            ctx.progress(0.2 + 0.8 * fraction, message)
+
+        process_blob(blob_name, progress=report)
+        if last["fraction"] < 1.0:
+            raise RuntimeError(f"Indexing {blob_name} did not complete; see logs")
+        return {"blob_name": blob_name}
+    finally:
+        _release_staged(ctx.queue, ctx.job_id, staged_path)
+
+
+def generate_job(ctx, generator, theme, payload):
+    """Build a deck through the artifact store; the result is its key."""
+    from artifact_store import get_artifact_store
+
+    def build():
+        ctx.progress(0.1, "Generating")
+        if generator == "generate_ppt_cognizant":
+            from generate_ppt_cognizant import generate_presentation_cognizant
+            return generate_presentation_cognizant(payload)
+        from generate_ppt_llm import generate_presentation
+        return generate_presentation(payload)
+
+    key, _, created = get_artifact_store().get_or_create(generator, theme, payload, build)
+    return {"artifact_key": key, "created": created}
+
+
+_default_queue = None
+_default_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Process-wide queue with the ingest/generate handlers, workers started."""
+    global _default_queue
+    with _default_lock:
+        if _default_queue is None:
+            _default_queue = JobQueue()
+            _default_queue.register("ingest", ingest_job)
+            _default_queue.register("generate", generate_job)
+            _default_queue.start()
+        return _default_queue
@@ -0,0 +1,272 @@
+# lexical_index.py
+import os
+import re
+import math
+import json
+import threading
+from collections import Counter
+from utils import get_env, logger, open_sqlite, tag_field
+
+LEXICAL_INDEX_DIR = get_env("LEXICAL_INDEX_DIR", get_env("CHROMA_PERSIST_DIR", "./chroma_db"))
+BM25_K1 = float(get_env("BM25_K1", 1.2))
+BM25_B = float(get_env("BM25_B", 0.75))
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "this to was were will with".split()
+)
+
+# Slide fields kept alongside the postings so lexical hits need no Chroma read.
+_META_FIELDS = ("ppt_name", "slide_id", "slide_index", "title", "tags")
+
+
+def lexical_index_path(collection):
+    """One index file per Chroma collection, so hits always exist in it."""
+    return os.path.join(LEXICAL_INDEX_DIR, f"lexical_{collection}.sqlite3")
+
+
+def tokenize(text):
+    return [
+        t for t in _TOKEN_RE.findall((text or "").lower())
+        if t not in _STOPWORDS
+    ]
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over slide text, stored in SQLite.
+
+    Each Chroma collection has its own index (``lexical_index_path``). Rows
+    use the same ids as that collection and are written and deleted
+    alongside it, so the index stays in step without rebuilds.
+    Document count and total length are kept in ``lexical_stats`` so a
+    query only reads the postings of its own terms.
+    """
+
+    def __init__(self, path, k1=BM25_K1, b=BM25_B):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(path)
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS lexical_docs (
+                    id       TEXT PRIMARY KEY,
+                    ppt_name TEXT,
+                    length   INTEGER NOT NULL,
+                    meta     TEXT NOT NULL,
+                    text     TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_lexical_docs_ppt ON lexical_docs(ppt_name)"
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS lexical_postings (
+                    term   TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    tf     INTEGER NOT NULL,
+                    PRIMARY KEY (term, doc_id)
+                ) WITHOUT ROWID
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_lexical_postings_doc ON lexical_postings(doc_id)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS lexical_stats (key TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO lexical_stats (key, value) VALUES ('doc_count', 0), ('total_length', 0)"
+            )
+
+    # ---------- writes ----------
+    def _delete_ids(self, ids):
+        removed, removed_len = 0, 0
+        for doc_id in ids:
+            row = self._conn.execute(
+                "SELECT length FROM lexical_docs WHERE id = ?", (doc_id,)
+            ).fetchone()
+            if not row:
+                continue
+            self._conn.execute("DELETE FROM lexical_postings WHERE doc_id = ?", (doc_id,))
+            self._conn.execute("DELETE FROM lexical_docs WHERE id = ?", (doc_id,))
+            removed += 1
+            removed_len += row[0]
+        self._add_stats(-removed, -removed_len)
+        return removed
+
+    def _add_stats(self, docs, length):
+        if docs or length:
+            self._conn.execute(
+                "UPDATE lexical_stats SET value = value + ? WHERE key = 'doc_count'", (docs,)
+            )
+            self._conn.execute(
+                "UPDATE lexical_stats SET value = value + ? WHERE key = 'total_length'", (length,)
+            )
+
+    def upsert(self, ids, documents, metadatas):
+        """Index (or re-index) slides; arguments mirror collection.upsert."""
+        with self._lock, self._conn:
+            self._delete_ids(ids)
+            total_len = 0
+            for doc_id, text, meta in zip(ids, documents, metadatas):
+                counts = Counter(tokenize(text))
+                length = sum(counts.values())
+                total_len += length
+                self._conn.execute(
+                    "INSERT INTO lexical_docs (id, ppt_name, length, meta, text) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        doc_id, meta.get("ppt_name"), length,
+                        json.dumps({k: meta.get(k) for k in _META_FIELDS}), text or ""
+                    ),
+                )
+                self._conn.executemany(
+                    "INSERT INTO lexical_postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                    [(term, doc_id, tf) for term, tf in counts.items()],
+                )
+            self._add_stats(len(ids), total_len)
+
+    def delete(self, ids=None, ppt_name=None):
+        """Remove slides by id and/or every slide of a deck. Returns rows removed."""
+        with self._lock, self._conn:
+            targets = list(ids or [])
+            if ppt_name is not None:
+                targets += [
+                    r[0] for r in self._conn.execute(
+                        "SELECT id FROM lexical_docs WHERE ppt_name = ?", (ppt_name,)
+                    )
+                ]
+            return self._delete_ids(targets)
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM lexical_postings")
+            self._conn.execute("DELETE FROM lexical_docs")
+            self._conn.execute("UPDATE lexical_stats SET value = 0")
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT value FROM lexical_stats WHERE key = 'doc_count'"
+            ).fetchone()[0]
+
+    def rebuild_from_collection(self, collection, page_size=1000):
+        """Backfill from a Chroma collection, e.g. for slides indexed before this index existed."""
+        offset, total = 0, 0
+        while True:
+            res = collection.get(
+                include=["documents", "metadatas"], limit=page_size, offset=offset
+            )
+            ids = res.get("ids") or []
+            if not ids:
+                break
+            self.upsert(ids, res.get("documents") or [""] * len(ids), res.get("metadatas") or [{}] * len(ids))
+            total += len(ids)
+            offset += len(ids)
+        logger.info(f"Lexical index rebuilt from collection: {total} slides")
+        return total
+
+    # ---------- queries ----------
+    def search(self, query, top_k=5, tags=None, tag_mode="any"):
+        """
+        BM25 top ``top_k`` slides as semantic_search-style dicts, where
+        ``score`` is the BM25 score (higher is better). ``tags`` keeps
+        slides carrying any (``tag_mode="any"``) or all (``"all"``) of them.
+        """
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return []
+
+        placeholders = ",".join("?" * len(terms))
+        with self._lock:
+            doc_count, total_len = (
+                r[0] for r in self._conn.execute(
+                    "SELECT value FROM lexical_stats WHERE key IN ('doc_count', 'total_length') ORDER BY key"
+                )
+            )
+            if not doc_count:
+                return []
+            df = dict(self._conn.execute(
+                f"SELECT term, COUNT(*) FROM lexical_postings WHERE term IN ({placeholders}) GROUP BY term",
+                terms,
+            ).fetchall())
+            rows = self._conn.execute(
+                f"SELECT p.doc_id, p.term, p.tf, d.length FROM lexical_postings p "
+                f"JOIN lexical_docs d ON d.id = p.doc_id WHERE p.term IN ({placeholders})",
+                terms,
+            ).fetchall()
+
+        avg_len = total_len / doc_count if doc_count else 1.0
+        scores = {}
+        for doc_id, term, tf, length in rows:
+            n = df.get(term, 0)
+            idf = math.log(1 + (doc_count - n + 0.5) / (n + 0.5))
+            norm = tf + self.k1 * (1 - self.b + self.b * length / (avg_len or 1.0))
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+
+        wanted = {tag_field(t) for t in tags or [] if str(t).strip()}
+        require_all = tag_mode == "all"
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        out = []
+        with self._lock:
+            for doc_id, score in ranked:
+                row = self._conn.execute(
+                    "SELECT meta, text FROM lexical_docs WHERE id = ?", (doc_id,)
+                ).fetchone()
+                if not row:
+                    continue
+                meta = json.loads(row[0])
+                if wanted:
+                    slide_tags = {tag_field(t) for t in (meta.get("tags") or "").split(",") if t.strip()}
+                    if not (wanted <= slide_tags if require_all else wanted & slide_tags):
+                        continue
+                out.append({
+                    "id": doc_id,
+                    "ppt_name": meta.get("ppt_name"),
+                    "slide_id": meta.get("slide_id"),
+                    "slide_index": int(meta.get("slide_index") or 0),
+                    "title": meta.get("title"),
+                    "text": row[1],
+                    "tags": meta.get("tags"),
+                    "score": round(score, 6),
+                })
+                if len(out) >= top_k:
+                    break
+        return out
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_lexical_index(collection):
+    """Process-wide index for the Chroma collection named ``collection``."""
+    with _indexes_lock:
+        index = _indexes.get(collection)
+        if index is None:
+            index = LexicalIndex(lexical_index_path(collection))
+            _indexes[collection] = index
+        return index
+
+
+def reciprocal_rank_fusion(result_lists, k=60, top_k=None):
+    """
+    Merge ranked result lists (dicts with an ``id``) by reciprocal rank:
+    each list adds 1 / (k + rank) for every item it returns. The first
+    occurrence of an item supplies its fields; ``score`` becomes the fused score.
+    """
+    fused, items = {}, {}
+    for results in result_lists:
+        for rank, item in enumerate(results, start=1):
+            fused[item["id"]] = fused.get(item["id"], 0.0) + 1.0 / (k + rank)
+            items.setdefault(item["id"], item)
+    ordered = sorted(fused, key=lambda i: -fused[i])
+    if top_k is not None:
+        ordered = ordered[:top_k]
+    return [{**items[i], "score": round(fused[i], 6)} for i in ordered]
@@ -0,0 +1,138 @@
+# llm_executor.py
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils import get_env, logger, retry_after_seconds
+
+LLM_CONCURRENCY = int(get_env("LLM_CONCURRENCY", 6))
+# Deployment quota; 0 disables the corresponding limit.
+LLM_RPM = int(get_env("LLM_RPM", 0))
+LLM_TPM = int(get_env("LLM_TPM", 0))
+LLM_DEFAULT_REQUEST_TOKENS = int(get_env("LLM_DEFAULT_REQUEST_TOKENS", 1000))
+LLM_MAX_RETRIES = int(get_env("LLM_MAX_RETRIES", 3))
+
+
+class TokenBucket:
+    """
+    Blocking token bucket refilled continuously at ``per_minute`` / 60 per
+    second. Bursts are capped at ten seconds' worth, since Azure OpenAI
+    enforces quotas over short windows rather than the full minute.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = max(1.0, per_minute / 6.0)
+        self.tokens = self.capacity
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, amount):
+        # Oversized requests wait for a full bucket rather than forever.
+        amount = min(float(amount), self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits for one deployment,
+    plus a shared pause that every caller honours after a 429.
+    """
+
+    def __init__(self, rpm=LLM_RPM, tpm=LLM_TPM):
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens):
+        while True:
+            with self._lock:
+                wait = self._paused_until - time.monotonic()
+            if wait <= 0:
+                break
+            time.sleep(wait)
+        if self.requests:
+            self.requests.take(1)
+        if self.tokens:
+            self.tokens.take(tokens)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def is_rate_limited(exc):
+    """True for a 429; callers inside executor tasks must let these propagate."""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status == 429
+
+
+class LLMExecutor:
+    """
+    Runs chat completions on a bounded thread pool behind a RateLimiter.
+
+    A 429 pauses all callers for the Retry-After interval (or an exponential
+    backoff) and the request is retried; other errors surface through the
+    returned Future.
+    """
+
+    def __init__(self, concurrency=LLM_CONCURRENCY, limiter=None,
+                 max_retries=LLM_MAX_RETRIES, backoff=1.0):
+        self.limiter = limiter or RateLimiter()
+        self.max_retries = max(0, max_retries)
+        self.backoff = backoff
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, concurrency), thread_name_prefix="llm"
+        )
+
+    def _call(self, fn, args, kwargs, cost):
+        attempt = 0
+        while True:
+            self.limiter.acquire(cost)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limited(e) or attempt >= self.max_retries:
+                    raise
+                delay = retry_after_seconds(e) or self.backoff * (2 ** attempt)
+                attempt += 1
+                logger.warning(
+                    f"LLM rate limited; retry {attempt}/{self.max_retries} in {delay:.1f}s"
+                )
+                self.limiter.pause(delay)
+
+    def submit(self, fn, *args, cost=None, **kwargs):
+        """Schedule fn(*args, **kwargs); ``cost`` is its estimated total tokens."""
+        cost = cost or LLM_DEFAULT_REQUEST_TOKENS
+        return self._pool.submit(self._call, fn, args, kwargs, cost)
+
+    def map(self, fn, items, cost=None):
+        """Submit fn(item) for each item; returns Futures in input order."""
+        return [
+            self.submit(fn, item, cost=cost(item) if cost else None)
+            for item in items
+        ]
+
+
+_default_executor = None
+_default_lock = threading.Lock()
+
+
+def get_llm_executor():
+    """Process-wide executor, so all sessions share the deployment's quota."""
+    global _default_executor
+    with _default_lock:
+        if _default_executor is None:
+            _default_executor = LLMExecutor()
+        return _default_executor
@@ -1,12 +1,11 @@
 # pages/1_Home.py
-import os
-import tempfile
 import streamlit as st
-from pptx import Presentation
 from search_utils import collection
 from search_utils import semantic_search
 from azure_blob_utils import download_source_ppt_from_blob
-from slide_renderer import extract_slide_structure
+from slide_renderer import extract_deck_structure
+from catalog_loader import load_catalog
+from slide_records import fetch_slide_records
 from utils import logger
 
 st.set_page_config(page_title="1 - Home", layout="wide")
@@ -21,29 +20,18 @@ st.session_state.setdefault("selected_slides", [])
 # ------------------------------------------------------------------
 # Helpers
 # ------------------------------------------------------------------
-def get_slide_title_from_chroma(ppt_name,slide_index):
-
-    if ppt_name is None or slide_index is None:
-        return None
-
+def get_slide_titles_from_chroma(ppt_name, slide_indices):
+    """{slide_index: title} for one deck in a single batched lookup."""
     try:
-        res = collection.get(
-            where={
-                "$and": [
-                    {"ppt_name": ppt_name},
-                    {"slide_index": slide_index}
-                ]
-            }
-        )
-
-        metas = res.get("metadatas", [])
-        if metas and metas[0].get("title"):
-            return metas[0]["title"].strip()
-
+        records = fetch_slide_records(collection, [(ppt_name, i) for i in slide_indices])
     except Exception:
-        logger.exception("Failed to fetch slide title from Chroma")
+        logger.exception("Failed to fetch slide titles from Chroma")
+        return {}
 
-    return None
+    return {
+        idx: (rec["metadata"].get("title") or "").strip()
+        for (_, idx), rec in records.items()
+    }
 
 # -----------------------------
 # Hard-coded keyword → PPT map
@@ -96,19 +84,17 @@ if st.button("Search dataset & Load Slides"):
         if matched_ppt:
             logger.info(f"Keyword match found → using PPT: {matched_ppt}")
 
-            local_ppt = os.path.join(
-                tempfile.gettempdir(),
-                matched_ppt.replace("/", "_")
-            )
-
-            if not os.path.exists(local_ppt):
-                download_source_ppt_from_blob(matched_ppt, local_ppt)
+            local_ppt = download_source_ppt_from_blob(matched_ppt)
 
-            prs = Presentation(local_ppt)
+            # One parse + one render pass for the whole deck
+            deck_structs = extract_deck_structure(local_ppt)
+            titles = get_slide_titles_from_chroma(
+                matched_ppt, [s["slide_index"] for s in deck_structs]
+            )
 
-            for idx in range(len(prs.slides)):
-                slide_struct = extract_slide_structure(local_ppt, idx)
-                chroma_title = get_slide_title_from_chroma(matched_ppt,idx).lower()
+            for slide_struct in deck_structs:
+                idx = slide_struct["slide_index"]
+                chroma_title = titles.get(idx, "").lower()
 
                 # ❌ Exclude agenda & thank-you
                 if "agenda" in chroma_title or "thank" in chroma_title:
@@ -129,27 +115,28 @@ if st.button("Search dataset & Load Slides"):
                 st.warning("No relevant slides found.")
                 st.stop()
 
-            for r in refs:
-                try:
-                    ppt_blob = r["ppt_name"]
-                    slide_index = r["slide_index"]
-
-                    local_ppt = os.path.join(
-                        tempfile.gettempdir(),
-                        ppt_blob.replace("/", "_")
-                    )
-
-                    if not os.path.exists(local_ppt):
-                        download_source_ppt_from_blob(ppt_blob, local_ppt)
-
-                    slide_struct = extract_slide_structure(local_ppt, slide_index)
-                    slide_struct["ppt_blob"] = ppt_blob
-                    slide_struct["slide_id"] = r["slide_id"]
+            # Decks download/parse concurrently; slides arrive as each thumbnail is ready
+            progress = st.progress(0.0, text="Loading slides...")
+            preview = st.empty()
+            total = len(refs)
 
-                    st.session_state["slides_catalog"].append(slide_struct)
-
-                except Exception as e:
-                    logger.exception(f"Failed loading slide: {e}")
+            for slide_struct in load_catalog(refs):
+                st.session_state["slides_catalog"].append(slide_struct)
+                loaded = len(st.session_state["slides_catalog"])
+                progress.progress(min(loaded / total, 1.0), text=f"Loaded {loaded} of {total} slides")
+                preview.image(
+                    slide_struct["png_path"],
+                    caption=f"{slide_struct['ppt_blob']} — slide {slide_struct['slide_index']}",
+                    width=320
+                )
+
+            preview.empty()
+
+            # Keep search relevance order for the selection grid
+            rank = {r["slide_id"]: i for i, r in enumerate(refs)}
+            st.session_state["slides_catalog"].sort(
+                key=lambda s: rank.get(s["slide_id"], len(rank))
+            )
 
         # ---------------------------------
         # 4️⃣ Finish
@@ -2,8 +2,10 @@
  
 import os
 import streamlit as st
-from utils import text_client, get_env, logger
+from utils import logger
 from search_utils import collection
+from question_generator import generate_questions_async
+from slide_records import SlideRecords
  
 st.set_page_config(page_title="3 - Q&A", layout="wide")
 st.title("Step 3 — Answer a Few Questions")
@@ -25,139 +27,8 @@ st.info(
 # Helpers
 # ------------------------------------------------------------------
 def get_slide_title_from_chroma(slide):
-    ppt_name = slide.get("ppt_blob") or slide.get("ppt_name")
-    slide_index = slide.get("slide_index")
+    return slide_records.title(slide)
  
-    if ppt_name is None or slide_index is None:
-        return None
- 
-    try:
-        res = collection.get(
-            where={
-                "$and": [
-                    {"ppt_name": ppt_name},
-                    {"slide_index": slide_index}
-                ]
-            }
-        )
- 
-        metas = res.get("metadatas", [])
-        if metas and metas[0].get("title"):
-            return metas[0]["title"].strip()
- 
-    except Exception:
-        logger.exception("Failed to fetch slide title from Chroma")
- 
-    return None
- 
- 
-def detect_slide_type(slide):
-    title = (slide.get("title") or "").lower()
- 
-    if "thank" in title:
-        return "thankyou"
-    if "agenda" in title:
-        return "agenda"
-    if slide.get("slide_index") == 0 or "title" in title:
-        return "title"
-    return "content"
- 
- 
- 
-def get_exact_slide_text(slide, max_chars=1200):
-    """
-    Fetch exact slide text using ppt_blob + slide_index
-    (NO embeddings, NO semantic search)
-    """
- 
-    ppt_name = slide.get("ppt_blob")
-    slide_index = slide.get("slide_index")
- 
-    if ppt_name is None or slide_index is None:
-        logger.warning("[QNA] Missing ppt_blob or slide_index")
-        return ""
- 
-    try:
-        logger.info(
-            f"[QNA] Fetching slide from Chroma | ppt={ppt_name} | index={slide_index}"
-        )
- 
-        res = collection.get(
-            where={
-                "$and": [
-                    {"ppt_name": ppt_name},
-                    {"slide_index": slide_index}
-                ]
-            }
-        )
- 
-        docs = res.get("documents", [])
-        logger.info(f"[QNA] Retrieved {len(docs)} docs from Chroma")
- 
-        if not docs:
-            return ""
- 
-        return "\n".join(docs)[:max_chars]
- 
-    except Exception:
-        logger.exception("[QNA] Chroma get() failed")
-        return ""
- 
- 
- 
- 
-def chroma_questions(slide, max_q=3):
-    """
-    Generate questions from EXACT slide text (no semantic search)
-    """
-    context = get_exact_slide_text(slide)
- 
-    if not context:
-        logger.warning(
-            f"No exact text found in Chroma for "
-            f"{slide.get('ppt_name')} | slide {slide.get('slide_index')}"
-        )
-        return []
- 
-    prompt = f"""
-You are analysing a PowerPoint slide.
- 
-SLIDE CONTENT:
-{context}
- 
-TASK:
-Generate up to {max_q} diverse, non-overlapping questions
-to help customize this slide.
- 
-Rules:
-- Each question must focus on a DIFFERENT aspect
-- Avoid objectives or key-points phrasing
-- No generic questions
-- Plain numbered list only
-"""
-    try:
-        resp = text_client.chat.completions.create(
-            model=get_env("CHAT_MODEL", required=True),
-            messages=[{"role": "user", "content": prompt}],
-            max_completion_tokens=300
-        )
- 
-        raw = resp.choices[0].message.content or ""
-        lines = [l.strip() for l in raw.splitlines() if l.strip()]
- 
-        questions = []
-        for ln in lines:
-            if ln[0].isdigit():
-                q = ln.split(".", 1)[-1].strip()
-                if q:
-                    questions.append(q)
- 
-        return questions[:max_q]
- 
-    except Exception as e:
-        logger.exception("LLM failed while generating questions from exact slide text")
-        return []
-   
  
 # ------------------------------------------------------------------
 # State init (CRITICAL FIX)
@@ -165,44 +36,27 @@ Rules:
 st.session_state.setdefault("questions_by_slide", {})
 st.session_state.setdefault("answers_by_slide", {})
  
+# Titles and slide text for all selected slides: one batched Chroma query,
+# reused across reruns until the collection version changes.
+slide_records = st.session_state.setdefault("_slide_records", SlideRecords(collection))
+slide_records.prefetch(slides)
+ 
 # ------------------------------------------------------------------
-# Generate questions per slide (ONCE)
+# Generate questions per slide (ONCE, concurrently)
 # ------------------------------------------------------------------
-for slide in slides:
-    slide_id = slide["slide_id"]
- 
-    if slide_id in st.session_state["questions_by_slide"]:
-        continue
- 
-    slide_type = detect_slide_type(slide)
-    questions = []
- 
-    if slide_type == "title":
-        questions = [
-            "What should be the title of this presentation?"
-        ]
- 
-    elif slide_type == "agenda":
-        questions = [
-            "What should be included in the agenda?"
-        ]
- 
-    elif slide_type == "thankyou":
-        questions = []
- 
-    else:
-        questions.append("What is the objective of this slide?")
- 
-        try:
-            llm_qs = chroma_questions(slide, max_q=3)
-            questions.extend(llm_qs)
-        except Exception:
-            logger.exception("Chroma-based question generation failed")
- 
-        questions.append("What are the key points to be added to this slide?")
- 
-    st.session_state["questions_by_slide"][slide_id] = questions
-    st.session_state["answers_by_slide"].setdefault(slide_id, {})
+# In-flight futures survive reruns so an early interaction does not
+# resubmit the LLM calls.
+pending_questions = st.session_state.setdefault("_question_futures", {})
+to_generate = [
+    s for s in slides
+    if s["slide_id"] not in st.session_state["questions_by_slide"]
+    and s["slide_id"] not in pending_questions
+]
+pending_questions.update(
+    generate_questions_async(to_generate, contexts={
+        s["slide_id"]: slide_records.text(s) for s in to_generate
+    })
+)
  
 # ------------------------------------------------------------------
 # UI Rendering
@@ -216,8 +70,6 @@ for idx, slide in enumerate(slides):
         or f"Slide {idx + 1}"
     )
  
-    questions = st.session_state["questions_by_slide"].get(slide_id, [])
- 
     st.markdown("---")
     st.subheader(f"Slide {idx + 1}: {slide_title}")
  
@@ -225,6 +77,21 @@ for idx, slide in enumerate(slides):
     if slide.get("png_path") and os.path.exists(slide["png_path"]):
         st.image(slide["png_path"], width=400)
  
+    # Earlier slides are already on screen while later ones finish
+    if slide_id not in st.session_state["questions_by_slide"]:
+        future = pending_questions.get(slide_id)
+        questions = []
+        if future is not None:
+            try:
+                with st.spinner("Generating questions..."):
+                    questions = future.result()
+            except Exception:
+                logger.exception("Question generation failed")
+        st.session_state["questions_by_slide"][slide_id] = questions
+        pending_questions.pop(slide_id, None)
+ 
+    questions = st.session_state["questions_by_slide"].get(slide_id, [])
+ 
     # 🔹 SAFETY INIT (fix >3 slides crash)
     st.session_state["answers_by_slide"].setdefault(slide_id, {})
  
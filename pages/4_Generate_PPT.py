@@ -1,8 +1,8 @@
 # pages/4_Generate_PPT.py
-import os
+import uuid
 import streamlit as st
 from generate_ppt import generate_presentation
-from utils import logger
+from utils import logger, PPTX_MIME
  
 st.set_page_config(page_title="4 - Generate PPT", layout="wide")
 st.title("4 — Generate & Download")
@@ -17,18 +17,18 @@ st.write("Generating final PPT from your selected slides and answers...")
  
 try:
     # ✅ CORRECT CALL — SINGLE PAYLOAD
-    out_path = generate_presentation(payload)
+    buf = generate_presentation(payload)
+    file_name = f"ppt_{uuid.uuid4().hex[:6]}.pptx"
  
     st.success("PPT generated successfully!")
-    st.markdown(f"**File:** `{os.path.basename(out_path)}`")
- 
-    with open(out_path, "rb") as f:
-        st.download_button(
-            "⬇️ Download PPT",
-            f,
-            file_name=os.path.basename(out_path),
-            mime="application/vnd.openxmlformats-officedocument.presentationml.presentation"
-        )
+    st.markdown(f"**File:** `{file_name}`")
+ 
+    st.download_button(
+        "⬇️ Download PPT",
+        buf,
+        file_name=file_name,
+        mime=PPTX_MIME
+    )
  
 except Exception as e:
     logger.exception("Generation failed")
@@ -51,9 +51,21 @@ if st.session_state.get("_preview_signature") != current_signature:
 if "preview_slides" not in st.session_state:
     preview_slides = []
 
-    from generate_ppt_llm import llm_synthesize_slide
+    from generate_ppt_llm import needs_synthesis, synthesize_slides_async
     global_prompt = "professional business presentation"
 
+    # Run every slide's completion concurrently; collect in slide order below
+    synth_slides = [
+        str(s["slide_index"]) for s in slides
+        if needs_synthesis(answers_map.get(str(s["slide_index"]), {}))
+    ]
+    synth_futures = dict(zip(
+        synth_slides,
+        synthesize_slides_async(
+            [answers_map[idx] for idx in synth_slides], global_prompt
+        )
+    ))
+
     for slide in slides:
         idx = str(slide["slide_index"])
         slide_title = slide["slide_title"]
@@ -85,10 +97,8 @@ if "preview_slides" not in st.session_state:
             # --------------------------------------------------
             else:
                 try:
-                    _, bullets = llm_synthesize_slide(
-                        user_answers,
-                        global_prompt
-                    )
+                    with st.spinner(f"Generating slide previews ({len(synth_slides)} in parallel)..."):
+                        _, bullets = synth_futures[idx].result()
                     title = slide_title
                 except Exception:
                     logger.exception("Preview generation failed")
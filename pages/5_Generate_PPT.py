@@ -1,8 +1,11 @@
 # pages/5_Generate_PPT.py
-import os
+import time
+import uuid
 import streamlit as st
 from datetime import datetime
-from utils import logger
+from utils import logger, PPTX_MIME
+from artifact_store import get_artifact_store, artifact_key
+from job_queue import get_job_queue
 
 st.set_page_config(page_title="5 - Generate PPT", layout="wide")
 st.title("Step 5 — Generate & Download Presentation")
@@ -33,46 +36,110 @@ def extract_title_from_payload(payload):
 
 
 # ------------------------------------------------------------
-# Generate PPT ONCE per payload (no duplicates)
+# Generate PPT ONCE per request (no duplicates)
 # ------------------------------------------------------------
+# Keyed by a content hash of (generator, theme, payload), which is stable
+# across reruns and processes; identical requests come from the store.
+generator = "generate_ppt_cognizant" if theme == "cognizant" else "generate_ppt_llm"
+request_key = artifact_key(generator, theme, payload)
+
+if "generation_jobs" not in st.session_state:
+    st.session_state["generation_jobs"] = {}
+if "cancelled_generations" not in st.session_state:
+    st.session_state["cancelled_generations"] = set()
+if "job_owner" not in st.session_state:
+    st.session_state["job_owner"] = uuid.uuid4().hex
+
 already_generated = any(
-    item.get("payload_id") == id(payload)
+    item.get("artifact_key") == request_key
     for item in st.session_state["generated_ppts"]
 )
 
-if not already_generated:
-    try:
-        # ---- Generate PPT ----
-        if theme == "cognizant":
-            from generate_ppt_cognizant import generate_presentation_cognizant
-            out_path = generate_presentation_cognizant(payload)
-        else:
-            from generate_ppt_llm import generate_presentation
-            out_path = generate_presentation(payload)
-
-        # ---- Build filename ----
-        title = extract_title_from_payload(payload)
-        safe_title = title.replace(" ", "_")[:50]
-        timestamp = datetime.now().strftime("%d_%b_%H-%M")
-        display_name = f"{safe_title}_{timestamp}.pptx"
-
-        # ---- Store in session (LATEST FIRST) ----
-        st.session_state["generated_ppts"].insert(
-            0,
-            {
-                "path": out_path,
-                "name": display_name,
-                "created_at": datetime.now(),
-                "payload_id": id(payload),  # 🔑 KEY FIX
-            }
-        )
 
+def add_generated(data, created):
+    # ---- Build filename ----
+    title = extract_title_from_payload(payload)
+    safe_title = title.replace(" ", "_")[:50]
+    timestamp = datetime.now().strftime("%d_%b_%H-%M")
+    display_name = f"{safe_title}_{timestamp}.pptx"
+
+    # ---- Store in session (LATEST FIRST) ----
+    # The deck stays in memory; reruns never reopen a file.
+    st.session_state["generated_ppts"].insert(
+        0,
+        {
+            "data": data,
+            "name": display_name,
+            "created_at": datetime.now(),
+            "artifact_key": request_key,  # 🔑 KEY FIX
+        }
+    )
+
+    if created:
         st.success("✅ PPT generated successfully!")
+    else:
+        st.success("✅ Identical PPT found — served from the artifact store.")
+
+
+def submit_generation(retry=False):
+    # Runs on the shared job queue, so a rerun or refresh does not cancel
+    # or repeat it; identical requests share one job.
+    job_id = get_job_queue().submit(
+        "generate",
+        {"generator": generator, "theme": theme, "payload": payload},
+        owner=st.session_state["job_owner"],
+        reuse_succeeded=not retry,
+    )
+    st.session_state["generation_jobs"][request_key] = job_id
+    st.session_state["cancelled_generations"].discard(request_key)
+    return job_id
+
 
-    except Exception as e:
-        logger.exception("Generation failed")
-        st.error(f"Failed to generate PPT: {e}")
-        st.stop()
+pending = False
+
+if not already_generated:
+    data = get_artifact_store().get(request_key)
+    if data is not None:
+        add_generated(data, created=False)
+    else:
+        jobs = get_job_queue()
+        job_id = st.session_state["generation_jobs"].get(request_key) or submit_generation()
+        job = jobs.get(job_id)
+        if job is None:
+            job = jobs.get(submit_generation())
+        # Cancelling a job shared with other sessions only unsubscribes this
+        # one, so the job itself may still be running.
+        status = job["status"]
+        if request_key in st.session_state["cancelled_generations"]:
+            status = "cancelled"
+
+        if status in ("queued", "running"):
+            pending = True
+            st.progress(job["progress"], text=job["message"] or "Generating...")
+            if st.button("✖ Cancel generation"):
+                if not jobs.cancel(job_id, owner=st.session_state["job_owner"]):
+                    st.session_state["cancelled_generations"].add(request_key)
+                st.rerun()
+
+        elif status == "succeeded":
+            data = get_artifact_store().get(job["result"]["artifact_key"])
+            if data is None:
+                # Evicted from the store since the job ran: build it again.
+                submit_generation(retry=True)
+                pending = True
+            else:
+                add_generated(data, job["result"]["created"])
+
+        else:
+            if status == "failed":
+                logger.error(f"Generation failed: {job['error']}")
+                st.error(f"Failed to generate PPT: {job['error']}")
+            else:
+                st.warning("Generation was cancelled.")
+            if st.button("🔁 Retry"):
+                submit_generation(retry=True)
+                st.rerun()
+            st.stop()
 
 else:
     st.info("ℹ️ PPT already generated for this preview.")
@@ -94,19 +161,23 @@ else:
             st.write(f"{idx + 1}. {item['name']}")
 
         with col2:
-            try:
-                with open(item["path"], "rb") as f:
-                    st.download_button(
-                        label="⬇️ Download",
-                        data=f,
-                        file_name=item["name"],
-                        mime="application/vnd.openxmlformats-officedocument.presentationml.presentation",
-                        key=f"download_{idx}",
-                    )
-            except Exception:
+            if item.get("data"):
+                st.download_button(
+                    label="⬇️ Download",
+                    data=item["data"],
+                    file_name=item["name"],
+                    mime=PPTX_MIME,
+                    key=f"download_{idx}",
+                )
+            else:
                 st.caption("File not available")
 
 st.markdown("---")
 
 if st.button("⬅ Back to Home"):
-    st.switch_page("pages/1_Home.py")
\ No newline at end of file
+    st.switch_page("pages/1_Home.py")
+
+# Poll until the background generation job finishes.
+if pending:
+    time.sleep(1)
+    st.rerun()
\ No newline at end of file
@@ -1,16 +1,15 @@
 # pages/0_📚_Knowledge_Base.py
 
+import time
+import uuid
 import streamlit as st
 from utils import logger
 from azure_blob_utils import (
-    upload_source_ppt_to_blob,
     list_source_ppt_blobs,
     delete_source_ppt_from_blob,
 )
-from ingestion_chroma import (
-    process_blob as ingest_process_blob,
-    delete_ppt_from_chroma,
-)
+from ingestion_chroma import delete_ppt_from_chroma
+from job_queue import get_job_queue, submit_ingest
 
 st.set_page_config(page_title="Knowledge Base", layout="wide")
 st.title("📚 Knowledge Base")
@@ -33,24 +32,50 @@ uploaded_files = st.file_uploader(
     accept_multiple_files=True,
 )
 
-if st.button("📥 Upload & Index") and uploaded_files:
-    with st.spinner("Uploading and indexing PPTs..."):
-        for upl in uploaded_files:
-            try:
-                ppt_bytes = upl.read()
-                blob_name = upl.name
-
-                # Upload to Azure Blob
-                upload_source_ppt_to_blob(ppt_bytes, blob_name)
-
-                # Index into Chroma
-                ingest_process_blob(blob_name)
+# Upload + indexing run on the shared job queue, so they keep going across
+# reruns and refreshes; this page only submits and polls.
+jobs = get_job_queue()
+if "job_owner" not in st.session_state:
+    st.session_state["job_owner"] = uuid.uuid4().hex
+if "kb_jobs" not in st.session_state:
+    st.session_state["kb_jobs"] = []
 
-                st.success(f"✅ Uploaded & indexed: {blob_name}")
-
-            except Exception as e:
-                logger.exception("Failed to upload/index PPT")
-                st.error(f"❌ Error processing {upl.name}: {e}")
+if st.button("📥 Upload & Index") and uploaded_files:
+    for upl in uploaded_files:
+        try:
+            job_id = submit_ingest(
+                jobs, upl.read(), upl.name, owner=st.session_state["job_owner"]
+            )
+            if job_id not in st.session_state["kb_jobs"]:
+                st.session_state["kb_jobs"].append(job_id)
+        except Exception as e:
+            logger.exception("Failed to queue PPT for indexing")
+            st.error(f"❌ Error processing {upl.name}: {e}")
+
+active = False
+for job_id in st.session_state["kb_jobs"]:
+    job = jobs.get(job_id)
+    if not job:
+        continue
+    blob_name = job["params"]["blob_name"]
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        if job["status"] in ("queued", "running"):
+            active = True
+            st.progress(job["progress"], text=f"{blob_name} — {job['message']}")
+        elif job["status"] == "succeeded":
+            st.success(f"✅ Uploaded & indexed: {blob_name}")
+        elif job["status"] == "cancelled":
+            st.warning(f"Cancelled: {blob_name}")
+        else:
+            st.error(f"❌ Error processing {blob_name}: {job['error']}")
+    with col2:
+        if job["status"] in ("queued", "running"):
+            if st.button("✖ Cancel", key=f"cancel_{job_id}"):
+                if not jobs.cancel(job_id, owner=st.session_state["job_owner"]):
+                    # Another session uploaded the same deck; stop following it here.
+                    st.session_state["kb_jobs"].remove(job_id)
+                st.rerun()
 
 st.markdown("---")
 
@@ -96,4 +121,9 @@ st.markdown("---")
 st.info(
     "ℹ️ Changes here immediately affect search, slide selection, and Q&A. "
     "Deleted PPTs are fully removed from Chroma."
-)
\ No newline at end of file
+)
+
+# Poll while this session has indexing jobs in flight.
+if active:
+    time.sleep(1)
+    st.rerun()
\ No newline at end of file
@@ -0,0 +1,123 @@
+# query_cache.py
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from utils import get_env, open_sqlite
+
+QUERY_CACHE_PATH = get_env(
+    "QUERY_CACHE_PATH",
+    os.path.join(get_env("CHROMA_PERSIST_DIR", "./chroma_db"), "query_cache.sqlite3")
+)
+QUERY_CACHE_MEMORY_ENTRIES = int(get_env("QUERY_CACHE_MEMORY_ENTRIES", 256))
+QUERY_CACHE_DISK_ENTRIES = int(get_env("QUERY_CACHE_DISK_ENTRIES", 10000))
+
+
+def normalize_query(query):
+    return " ".join((query or "").lower().split())
+
+
+def query_key(query, top_k, tags, version, **extra):
+    raw = json.dumps(
+        {
+            "q": normalize_query(query),
+            "k": top_k,
+            "tags": sorted(tags or []),
+            "v": version,
+            **extra,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class QueryCache:
+    """
+    Two-level cache of search results: an in-process LRU in front of a SQLite
+    table. The collection version is part of the key, so any change to the
+    knowledge base makes older entries unreachable.
+    """
+
+    def __init__(self, path=QUERY_CACHE_PATH,
+                 memory_entries=QUERY_CACHE_MEMORY_ENTRIES,
+                 disk_entries=QUERY_CACHE_DISK_ENTRIES):
+        self.memory_entries = max(1, memory_entries)
+        self.disk_entries = max(1, disk_entries)
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(path)
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS query_results (
+                    key         TEXT PRIMARY KEY,
+                    version     INTEGER NOT NULL,
+                    results     TEXT NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+
+    def _remember(self, key, raw):
+        self._memory[key] = raw
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Cached results for ``key`` (a fresh copy), or None."""
+        with self._lock:
+            raw = self._memory.get(key)
+            if raw is not None:
+                self._memory.move_to_end(key)
+            else:
+                row = self._conn.execute(
+                    "SELECT results FROM query_results WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    raw = row[0]
+                    self._remember(key, raw)
+                    with self._conn:
+                        self._conn.execute(
+                            "UPDATE query_results SET last_access = ? WHERE key = ?",
+                            (time.time(), key),
+                        )
+            if raw is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(raw)
+
+    def put(self, key, version, results):
+        raw = json.dumps(results)
+        with self._lock:
+            self._remember(key, raw)
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO query_results (key, version, results, last_access) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, version, raw, time.time()),
+                )
+                # Results from older collection versions can never be hit again.
+                self._conn.execute(
+                    "DELETE FROM query_results WHERE version < ?", (version,)
+                )
+                self._conn.execute(
+                    "DELETE FROM query_results WHERE key IN ("
+                    "SELECT key FROM query_results ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.disk_entries,),
+                )
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
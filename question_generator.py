@@ -0,0 +1,167 @@
+# question_generator.py
+from concurrent.futures import Future
+from utils import text_client, get_env, logger
+from search_utils import collection
+from llm_executor import get_llm_executor, is_rate_limited
+from completion_cache import cached_chat_completion
+
+QUESTION_MAX_TOKENS = 300
+
+
+def detect_slide_type(slide):
+    title = (slide.get("title") or "").lower()
+
+    if "thank" in title:
+        return "thankyou"
+    if "agenda" in title:
+        return "agenda"
+    if slide.get("slide_index") == 0 or "title" in title:
+        return "title"
+    return "content"
+
+
+def get_exact_slide_text(slide, max_chars=1200):
+    """
+    Fetch exact slide text using ppt_blob + slide_index
+    (NO embeddings, NO semantic search)
+    """
+
+    ppt_name = slide.get("ppt_blob")
+    slide_index = slide.get("slide_index")
+
+    if ppt_name is None or slide_index is None:
+        logger.warning("[QNA] Missing ppt_blob or slide_index")
+        return ""
+
+    try:
+        logger.info(
+            f"[QNA] Fetching slide from Chroma | ppt={ppt_name} | index={slide_index}"
+        )
+
+        res = collection.get(
+            where={
+                "$and": [
+                    {"ppt_name": ppt_name},
+                    {"slide_index": slide_index}
+                ]
+            }
+        )
+
+        docs = res.get("documents", [])
+        logger.info(f"[QNA] Retrieved {len(docs)} docs from Chroma")
+
+        if not docs:
+            return ""
+
+        return "\n".join(docs)[:max_chars]
+
+    except Exception:
+        logger.exception("[QNA] Chroma get() failed")
+        return ""
+
+
+def chroma_questions(slide, max_q=3, context=None):
+    """
+    Generate questions from EXACT slide text (no semantic search).
+    ``context`` skips the Chroma lookup when the caller already has the text.
+    """
+    if context is None:
+        context = get_exact_slide_text(slide)
+
+    if not context:
+        logger.warning(
+            f"No exact text found in Chroma for "
+            f"{slide.get('ppt_name')} | slide {slide.get('slide_index')}"
+        )
+        return []
+
+    prompt = f"""
+You are analysing a PowerPoint slide.
+
+SLIDE CONTENT:
+{context}
+
+TASK:
+Generate up to {max_q} diverse, non-overlapping questions
+to help customize this slide.
+
+Rules:
+- Each question must focus on a DIFFERENT aspect
+- Avoid objectives or key-points phrasing
+- No generic questions
+- Plain numbered list only
+"""
+    try:
+        raw = cached_chat_completion(
+            text_client,
+            model=get_env("CHAT_MODEL", required=True),
+            messages=[{"role": "user", "content": prompt}],
+            max_completion_tokens=QUESTION_MAX_TOKENS
+        )
+        lines = [l.strip() for l in raw.splitlines() if l.strip()]
+
+        questions = []
+        for ln in lines:
+            if ln[0].isdigit():
+                q = ln.split(".", 1)[-1].strip()
+                if q:
+                    questions.append(q)
+
+        return questions[:max_q]
+
+    except Exception as e:
+        # 429s go back to the LLMExecutor, which pauses and retries the task.
+        if is_rate_limited(e):
+            raise
+        logger.exception("LLM failed while generating questions from exact slide text")
+        return []
+
+
+def build_slide_questions(slide, context=None):
+    """Full question list for one selected slide, by slide type."""
+    slide_type = detect_slide_type(slide)
+
+    if slide_type == "title":
+        return ["What should be the title of this presentation?"]
+
+    if slide_type == "agenda":
+        return ["What should be included in the agenda?"]
+
+    if slide_type == "thankyou":
+        return []
+
+    questions = ["What is the objective of this slide?"]
+
+    try:
+        questions.extend(chroma_questions(slide, max_q=3, context=context))
+    except Exception as e:
+        if is_rate_limited(e):
+            raise
+        logger.exception("Chroma-based question generation failed")
+
+    questions.append("What are the key points to be added to this slide?")
+    return questions
+
+
+def generate_questions_async(slides, contexts=None):
+    """
+    Start build_slide_questions for every slide concurrently on the shared
+    LLM executor; returns {slide_id: Future}. Slides that need no LLM call
+    get an already-completed Future. ``contexts`` maps slide_id to
+    pre-fetched slide text.
+    """
+    executor = get_llm_executor()
+    contexts = contexts or {}
+    futures = {}
+    for slide in slides:
+        if detect_slide_type(slide) == "content":
+            futures[slide["slide_id"]] = executor.submit(
+                build_slide_questions, slide,
+                context=contexts.get(slide["slide_id"]),
+                cost=400 + QUESTION_MAX_TOKENS
+            )
+        else:
+            done = Future()
+            done.set_result(build_slide_questions(slide))
+            futures[slide["slide_id"]] = done
+    return futures
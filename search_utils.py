@@ -1,27 +1,32 @@
 import os
-from openai import AzureOpenAI
 from chromadb import PersistentClient
-from utils import get_env, logger, get_embedding_dim
-
-# === TEXT client (GPT + embeddings) ===
-text_client = AzureOpenAI(
-    azure_endpoint=get_env("OPENAI_API_BASE", required=True),
-    api_key=get_env("OPENAI_API_KEY", required=True),
-    api_version=get_env("OPENAI_API_VERSION", "2024-05-01-preview")
-)
+from utils import get_env, logger, tag_where
+from embedding_providers import get_embedding_provider, collection_name
+from query_cache import QueryCache, query_key
+from collection_version import get_collection_version
+from lexical_index import get_lexical_index, reciprocal_rank_fusion
 
 EMBEDDING_MODEL = get_env("EMBEDDING_MODEL", "text-embedding-3-large")
-EMBEDDING_DIM = get_embedding_dim(EMBEDDING_MODEL)
+embedding_provider = get_embedding_provider(EMBEDDING_MODEL)
 CHROMA_PERSIST_DIR = get_env("CHROMA_PERSIST_DIR", "./chroma_db")
 
+# hybrid: BM25 + vector results fused by reciprocal rank | vector | lexical (no embedding call)
+SEARCH_MODE = get_env("SEARCH_MODE", "hybrid").lower()
+SEARCH_MODES = ("hybrid", "vector", "lexical")
+# Candidates taken from each retriever before fusion, and the RRF damping constant.
+HYBRID_CANDIDATES = int(get_env("HYBRID_CANDIDATES", 50))
+RRF_K = int(get_env("RRF_K", 60))
+
 
 # === Chroma Initialization (Safe) ===
 chroma_client = PersistentClient(path=CHROMA_PERSIST_DIR)
 
 try:
-    collection = chroma_client.get_collection("ppt_slides")
+    collection = chroma_client.get_collection(collection_name(embedding_provider))
 except Exception:
-    collection = chroma_client.create_collection("ppt_slides")
+    collection = chroma_client.create_collection(collection_name(embedding_provider))
+
+query_cache = QueryCache()
 
 
 # ------------------------------------------------------------
@@ -29,64 +34,100 @@ except Exception:
 # ------------------------------------------------------------
 def get_embedding(text):
     try:
-        resp = text_client.embeddings.create(
-            model=EMBEDDING_MODEL,
-            input=text
-        )
-        return resp.data[0].embedding
+        return embedding_provider.embed([text])[0]
     except Exception as e:
         logger.exception(f"Embedding failed: {e}")
         return None
 
 
 # ------------------------------------------------------------
-# SEMANTIC SEARCH (Chroma-compatible filtering)
+# VECTOR SEARCH (Chroma-compatible filtering)
 # ------------------------------------------------------------
-def semantic_search(query, top_k=5, tags=None):
+def vector_search(query, top_k=5, tags=None, tag_mode="any"):
+    """Nearest slides by embedding; ``score`` is the Chroma distance."""
     emb = get_embedding(query)
     if emb is None:
-        return []
+        return None
+
+    # Each tag is its own boolean field (tag_<name>), so several tags
+    # combine with $or / $and inside the ANN query.
+    filters = tag_where(tags, tag_mode)
+
+    if filters:
+        res = collection.query(
+            query_embeddings=[emb],
+            n_results=top_k,
+            where=filters
+        )
+    else:
+        res = collection.query(
+            query_embeddings=[emb],
+            n_results=top_k
+        )
 
-    # Chroma DOES NOT support $or, $contains anymore.
-    # It only supports simple equality match:
-    # where = { "tag": "value" }
-    filters = None
-    if tags and len(tags) > 0:
-        filters = {"tags": tags[0]}   # pick first tag for filtering
+    ids = res.get("ids", [[]])[0]
+    metas = res.get("metadatas", [[]])[0]
+    docs = res.get("documents", [[]])[0]
+    dists = res.get("distances", [[]])[0]
+
+    out = []
+    for i in range(len(ids)):
+        out.append({
+            "id": ids[i],
+            "ppt_name": metas[i].get("ppt_name"),
+            "slide_id": metas[i].get("slide_id"),
+            "slide_index": int(metas[i].get("slide_index")),  # ✅ ADD THIS
+            "title": metas[i].get("title"),
+            "text": docs[i],
+            "tags": metas[i].get("tags"),
+            "score": dists[i]
+        })
+    return out
+
+
+# ------------------------------------------------------------
+# SEMANTIC SEARCH (hybrid BM25 + vector)
+# ------------------------------------------------------------
+def semantic_search(query, top_k=5, tags=None, mode=None, tag_mode="any"):
+    """
+    Top ``top_k`` slides for a query. ``mode`` (default SEARCH_MODE):
+    hybrid fuses BM25 and vector rankings with reciprocal rank fusion,
+    so exact client/system names rank well; lexical skips the embedding
+    call entirely; vector is plain similarity search.
+    ``tags`` restricts results to slides with any (``tag_mode="any"``)
+    or all (``"all"``) of the given tags.
+    """
+    mode = (mode or SEARCH_MODE).lower()
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unsupported SEARCH_MODE: {mode}")
+
+    version = get_collection_version()
+    cache_key = query_key(
+        query, top_k, tags, version, embedder=embedding_provider.model_id, mode=mode,
+        tag_mode=tag_mode
+    )
+    cached = query_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
     try:
-        if filters:
-            res = collection.query(
-                query_embeddings=[emb],
-                n_results=top_k,
-                where=filters
-            )
+        if mode == "lexical":
+            out = get_lexical_index(collection.name).search(query, top_k=top_k, tags=tags, tag_mode=tag_mode)
+        elif mode == "vector":
+            out = vector_search(query, top_k=top_k, tags=tags, tag_mode=tag_mode)
         else:
-            res = collection.query(
-                query_embeddings=[emb],
-                n_results=top_k
-            )
-
-        ids = res.get("ids", [[]])[0]
-        metas = res.get("metadatas", [[]])[0]
-        docs = res.get("documents", [[]])[0]
-        dists = res.get("distances", [[]])[0]
-
-        out = []
-        for i in range(len(ids)):
-            out.append({
-                "id": ids[i],
-                "ppt_name": metas[i].get("ppt_name"),
-                "slide_id": metas[i].get("slide_id"),
-                "slide_index": int(metas[i].get("slide_index")),  # ✅ ADD THIS
-                "title": metas[i].get("title"),
-                "text": docs[i],
-                "tags": metas[i].get("tags"),
-                "score": dists[i]
-            })
-
-        return out
-
+            candidates = max(top_k, HYBRID_CANDIDATES)
+            lexical = get_lexical_index(collection.name).search(query, top_k=candidates, tags=tags, tag_mode=tag_mode)
+            vector = vector_search(query, top_k=candidates, tags=tags, tag_mode=tag_mode)
+            if vector is None and not lexical:
+                out = None
+            else:
+                out = reciprocal_rank_fusion([vector or [], lexical], k=RRF_K, top_k=top_k)
     except Exception as e:
-        logger.exception(f"Chroma query failed: {e}")
-        return []
\ No newline at end of file
+        logger.exception(f"Search failed ({mode}): {e}")
+        return []
+
+    if out is None:
+        return []
+    query_cache.put(cache_key, version, out)
+    return out
@@ -1,32 +1,46 @@
 # slide_extractor.py
 import os
-import tempfile
-import uuid
+import shutil
+import hashlib
 from copy import deepcopy
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from PIL import Image, ImageDraw, ImageFont
-from utils import get_env, logger
-from azure.storage.blob import BlobServiceClient
+from utils import logger
+from thumbnail_cache import ThumbnailCache, get_thumbnail_cache
+from blob_cache import get_source_blob_cache
 
-AZURE_CONN = get_env("AZURE_BLOB_CONN", required=True)
-BLOB_CONTAINER = get_env("AZURE_BLOB_CONTAINER", "ppt-dataset")
 
 def download_blob_to_local(blob_name: str, dest_path: str):
     """
-    Download blob from the source container to a local file path.
+    Copy a blob from the source container to a local file path,
+    downloading only when the cached copy is stale.
     """
     try:
-        blob_service = BlobServiceClient.from_connection_string(AZURE_CONN)
-        container_client = blob_service.get_container_client(BLOB_CONTAINER)
-        with open(dest_path, "wb") as fp:
-            stream = container_client.download_blob(blob_name)
-            stream.readinto(fp)
+        shutil.copyfile(get_source_blob_cache().fetch(blob_name), dest_path)
         return dest_path
     except Exception as e:
         logger.exception(f"Failed to download blob {blob_name}: {e}")
         raise
 
+def extract_slide_texts(local_path):
+    """
+    Text of every slide as [{"index": int, "text": str}]. Kept free of
+    module state so ingestion can run it in spawned worker processes.
+    """
+    prs = Presentation(local_path)
+    slides = []
+    for i, slide in enumerate(prs.slides):
+        texts = []
+        for shape in slide.shapes:
+            if hasattr(shape, "text") and shape.text and shape.text.strip():
+                texts.append(shape.text.strip())
+        slides.append({
+            "index": i,
+            "text": "\n".join(texts)
+        })
+    return slides
+
 def extract_slides_info_from_ppt(local_ppt_path: str):
     """
     Return list of slide metadata dicts:
@@ -71,6 +85,13 @@ def _make_text_preview_image(title: str, body_text: str, width=800, height=450):
     This is for UI selection only.
     """
     try:
+        cache = get_thumbnail_cache()
+        text_hash = hashlib.sha1(f"{title}\n{body_text}".encode("utf-8")).hexdigest()
+        key = ThumbnailCache.make_key(f"text-preview:{text_hash}", 0, width, height, "PNG")
+        cached = cache.get(key)
+        if cached:
+            return cached
+
         img = Image.new("RGB", (width, height), color=(245, 246, 250))
         draw = ImageDraw.Draw(img)
 
@@ -96,10 +117,7 @@ def _make_text_preview_image(title: str, body_text: str, width=800, height=450):
             draw.text((padding + 10, y), u"\u2022 " + ln[:120], font=font_body, fill=(40, 40, 40))
             y += 22
 
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-        img.save(tmp.name, format="PNG")
-        tmp.close()
-        return tmp.name
+        return cache.put(key, img)
     except Exception as e:
         logger.exception(f"Failed to create preview image: {e}")
         return None
\ No newline at end of file
@@ -0,0 +1,620 @@
+# slide_rasterizer.py
+# Headless slide thumbnails with python-pptx + Pillow (no PowerPoint needed).
+#
+# Colors and fills are read straight from the DrawingML XML: several
+# python-pptx accessors (Font.color, LineFormat.fill, ...) add elements when
+# they are read, and decks may be shared read-only between callers.
+import os
+import threading
+import multiprocessing
+from io import BytesIO
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+
+from lxml import etree
+from pptx.util import Pt
+from pptx.enum.shapes import MSO_SHAPE_TYPE, MSO_SHAPE
+from pptx.enum.text import MSO_ANCHOR
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from PIL import Image, ImageDraw, ImageFont
+
+from utils import get_env, logger
+from deck_cache import load_presentation
+from thumbnail_cache import ThumbnailCache, get_thumbnail_cache, deck_content_key
+
+RENDER_WIDTH = int(get_env("SLIDE_RENDER_WIDTH", 1920))
+RENDER_WORKERS = int(get_env("SLIDE_RENDER_WORKERS", os.cpu_count() or 1))
+
+DEFAULT_FONT_SIZE = Pt(18)
+DEFAULT_TITLE_SIZE = Pt(36)
+DARK_TEXT = (0, 0, 0)
+LIGHT_TEXT = (255, 255, 255)
+PLACEHOLDER_FILL = (225, 228, 235)
+
+_A = "http://schemas.openxmlformats.org/drawingml/2006/main"
+_P = "http://schemas.openxmlformats.org/presentationml/2006/main"
+_R = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_NS = {"a": _A, "p": _P, "r": _R}
+
+# Slide-level aliases used by schemeClr before the master's clrMap applies.
+_SCHEME_ALIASES = {"bg1": "lt1", "tx1": "dk1", "bg2": "lt2", "tx2": "dk2"}
+
+
+# ------------------------------------------------------------
+# FONTS / COLORS
+# ------------------------------------------------------------
+@lru_cache(maxsize=256)
+def _font(size_px, bold=False):
+    name = "DejaVuSans-Bold.ttf" if bold else "DejaVuSans.ttf"
+    try:
+        return ImageFont.truetype(name, size_px)
+    except Exception:
+        try:
+            return ImageFont.load_default(size=size_px)
+        except TypeError:
+            # Pillow < 10.1 has a single fixed-size bitmap font
+            return ImageFont.load_default()
+
+
+def _local(el):
+    return etree.QName(el).localname
+
+
+def _hex_rgb(val):
+    return tuple(int(val[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def _load_theme_colors(prs):
+    """Map scheme slot names (accent1, dk1, ...) to RGB from the master's theme."""
+    colors = {}
+    try:
+        theme_part = prs.slide_master.part.part_related_by(RT.THEME)
+        scheme = etree.fromstring(theme_part.blob).find(".//a:clrScheme", _NS)
+        for slot in (scheme if scheme is not None else []):
+            for child in slot:
+                val = child.get("val") if _local(child) == "srgbClr" else child.get("lastClr")
+                if val:
+                    colors[_local(slot)] = _hex_rgb(val)
+    except Exception:
+        logger.debug("Theme colors unavailable; using defaults")
+    return colors
+
+
+def _xml_color(el, theme):
+    """RGB for a DrawingML color element (srgbClr, schemeClr, sysClr) and its modifiers."""
+    if el is None:
+        return None
+    name = _local(el)
+    if name == "srgbClr":
+        rgb = _hex_rgb(el.get("val", "000000"))
+    elif name == "schemeClr":
+        val = el.get("val")
+        rgb = theme.get(_SCHEME_ALIASES.get(val, val))
+    elif name == "sysClr":
+        rgb = _hex_rgb(el.get("lastClr", "000000"))
+    else:
+        rgb = None
+    if rgb is None:
+        return None
+
+    r, g, b = (float(c) for c in rgb)
+    for mod in el:
+        try:
+            v = int(mod.get("val", 100000)) / 100000
+        except ValueError:
+            continue
+        kind = _local(mod)
+        if kind in ("lumMod", "shade"):
+            r, g, b = r * v, g * v, b * v
+        elif kind == "lumOff":
+            r, g, b = r + 255 * v, g + 255 * v, b + 255 * v
+        elif kind == "tint":
+            r, g, b = (c + (255 - c) * (1 - v) for c in (r, g, b))
+    return tuple(max(0, min(255, int(c))) for c in (r, g, b))
+
+
+_NO_FILL = False
+
+
+def _xml_fill(parent, theme):
+    """
+    Color of the fill declared directly under ``parent``.
+    Returns an RGB tuple, _NO_FILL for an explicit <a:noFill/>, or None when
+    no fill is declared (so the caller may fall back to the shape style).
+    """
+    if parent is None:
+        return None
+    for child in parent:
+        name = _local(child)
+        if name == "noFill":
+            return _NO_FILL
+        if name == "solidFill":
+            return _xml_color(child[0], theme) if len(child) else None
+        if name == "gradFill":
+            stops = [
+                _xml_color(gs[0], theme)
+                for gs in child.findall("a:gsLst/a:gs", _NS) if len(gs)
+            ]
+            stops = [c for c in stops if c]
+            if stops:
+                return tuple(sum(c[i] for c in stops) // len(stops) for i in range(3))
+            return None
+        if name == "pattFill":
+            fg = child.find("a:fgClr", _NS)
+            return _xml_color(fg[0], theme) if fg is not None and len(fg) else None
+    return None
+
+
+def _style_color(element, ref, theme):
+    """Color from <p:style><a:fillRef|lnRef|fontRef>; idx 0 means 'none'."""
+    el = element.find(f"p:style/a:{ref}", _NS)
+    if el is None or el.get("idx") == "0" or not len(el):
+        return None
+    return _xml_color(el[0], theme)
+
+
+def _luminance(rgb):
+    return 0.299 * rgb[0] + 0.587 * rgb[1] + 0.114 * rgb[2]
+
+
+def _contrast_text(rgb):
+    return LIGHT_TEXT if rgb and _luminance(rgb) < 128 else DARK_TEXT
+
+
+@lru_cache(maxsize=64)
+def _decoded(blob, size, mode):
+    """
+    Decode an embedded image at its target size. Layout/master pictures repeat
+    on every slide, so decoded copies are reused (callers must not mutate them).
+    """
+    img = Image.open(BytesIO(blob))
+    img.draft("RGB", size)  # JPEG: decode at reduced scale
+    return img.convert(mode).resize(size, Image.BILINEAR)
+
+
+def _average_color(img):
+    return img.resize((1, 1), Image.BILINEAR).getpixel((0, 0))[:3]
+
+
+# ------------------------------------------------------------
+# BACKGROUND
+# ------------------------------------------------------------
+def _background(owner, theme):
+    """(color, image_blob) declared by a slide, layout or master; (None, None) if inherited."""
+    bg = owner._element.find("p:cSld/p:bg", _NS)
+    if bg is None:
+        return None, None
+    bg_pr = bg.find("p:bgPr", _NS)
+    if bg_pr is not None:
+        blip = bg_pr.find("a:blipFill/a:blip", _NS)
+        if blip is not None:
+            try:
+                return None, owner.part.related_part(blip.get(f"{{{_R}}}embed")).blob
+            except Exception:
+                return None, None
+        return (_xml_fill(bg_pr, theme) or None), None
+    bg_ref = bg.find("p:bgRef", _NS)
+    if bg_ref is not None and len(bg_ref):
+        return _xml_color(bg_ref[0], theme), None
+    return None, None
+
+
+def _paint_background(canvas, slide, theme):
+    """Paint the effective background and return its (average) color."""
+    layout = slide.slide_layout
+    for owner in (slide, layout, layout.slide_master):
+        color, blob = _background(owner, theme)
+        if blob:
+            try:
+                img = _decoded(blob, canvas.size, "RGB")
+                canvas.paste(img, (0, 0))
+                return _average_color(img)
+            except Exception:
+                continue
+        if color:
+            canvas.paste(color, (0, 0, canvas.size[0], canvas.size[1]))
+            return color
+    return (255, 255, 255)
+
+
+# ------------------------------------------------------------
+# GEOMETRY
+# ------------------------------------------------------------
+class _Transform:
+    """Maps shape EMU coordinates (possibly inside nested groups) to pixels."""
+
+    def __init__(self, scale, off=(0, 0), ch_off=(0, 0), ratio=(1.0, 1.0), parent=None):
+        self.scale = scale
+        self.off = off
+        self.ch_off = ch_off
+        self.ratio = ratio
+        self.parent = parent
+
+    def _to_parent(self, x, y, w, h):
+        rx, ry = self.ratio
+        return (
+            self.off[0] + (x - self.ch_off[0]) * rx,
+            self.off[1] + (y - self.ch_off[1]) * ry,
+            w * rx,
+            h * ry,
+        )
+
+    def box(self, x, y, w, h):
+        t = self
+        while t.parent is not None:
+            x, y, w, h = t._to_parent(x, y, w, h)
+            t = t.parent
+        s = self.scale
+        return (x * s, y * s, (x + w) * s, (y + h) * s)
+
+    def child(self, group):
+        xfrm = group._element.find("p:grpSpPr/a:xfrm", _NS)
+        if xfrm is None:
+            return _Transform(self.scale, parent=self)
+
+        def _pair(tag, a, b):
+            el = xfrm.find(f"a:{tag}", _NS)
+            return (int(el.get(a, 0)), int(el.get(b, 0))) if el is not None else (0, 0)
+
+        off = _pair("off", "x", "y")
+        ext = _pair("ext", "cx", "cy")
+        ch_off = _pair("chOff", "x", "y")
+        ch_ext = _pair("chExt", "cx", "cy")
+        ratio = (
+            ext[0] / ch_ext[0] if ch_ext[0] else 1.0,
+            ext[1] / ch_ext[1] if ch_ext[1] else 1.0,
+        )
+        return _Transform(self.scale, off, ch_off, ratio, parent=self)
+
+
+def _polygon_points(kind, box):
+    x0, y0, x1, y1 = box
+    w, h = x1 - x0, y1 - y0
+    mx, my = x0 + w / 2, y0 + h / 2
+    if kind == MSO_SHAPE.ISOSCELES_TRIANGLE:
+        return [(mx, y0), (x1, y1), (x0, y1)]
+    if kind == MSO_SHAPE.RIGHT_TRIANGLE:
+        return [(x0, y0), (x1, y1), (x0, y1)]
+    if kind == MSO_SHAPE.DIAMOND:
+        return [(mx, y0), (x1, my), (mx, y1), (x0, my)]
+    if kind == MSO_SHAPE.PENTAGON:
+        tip = min(w, h / 2)
+        return [(x0, y0), (x1 - tip, y0), (x1, my), (x1 - tip, y1), (x0, y1)]
+    if kind == MSO_SHAPE.CHEVRON:
+        tip = min(w / 2, h / 2)
+        return [(x0, y0), (x1 - tip, y0), (x1, my), (x1 - tip, y1), (x0, y1), (x0 + tip, my)]
+    return None
+
+
+def _draw_geometry(draw, shape, box, fill, outline, line_px):
+    try:
+        kind = shape.auto_shape_type
+    except Exception:
+        kind = None
+
+    if kind == MSO_SHAPE.OVAL:
+        draw.ellipse(box, fill=fill, outline=outline, width=line_px)
+        return
+    if kind == MSO_SHAPE.ROUNDED_RECTANGLE:
+        radius = int(min(box[2] - box[0], box[3] - box[1]) * 0.16)
+        draw.rounded_rectangle(box, radius=radius, fill=fill, outline=outline, width=line_px)
+        return
+    points = _polygon_points(kind, box) if kind is not None else None
+    if points:
+        draw.polygon(points, fill=fill, outline=outline, width=line_px)
+        return
+    draw.rectangle(box, fill=fill, outline=outline, width=line_px)
+
+
+def _shape_fill(shape, theme, background):
+    element = shape._element
+    if element.get("useBgFill") == "1":
+        return background
+    fill = _xml_fill(element.find("p:spPr", _NS), theme)
+    if fill is None:
+        fill = _style_color(element, "fillRef", theme)
+    return fill or None
+
+
+def _shape_line(shape, theme, scale):
+    element = shape._element
+    ln = element.find("p:spPr/a:ln", _NS)
+    color = _xml_fill(ln, theme)
+    if color is None:
+        color = _style_color(element, "lnRef", theme)
+    if not color:
+        return None, 1
+    width = int(ln.get("w", 12700)) if ln is not None else 12700
+    return color, max(1, int(width * scale))
+
+
+def _rotated(shape):
+    xfrm = shape._element.find("p:spPr/a:xfrm", _NS)
+    return xfrm is not None and int(xfrm.get("rot", 0)) % 10800000 != 0
+
+
+# ------------------------------------------------------------
+# TEXT
+# ------------------------------------------------------------
+def _wrap(text, font, max_width):
+    lines = []
+    for raw in text.split("\n"):
+        words = raw.split(" ")
+        line = ""
+        for word in words:
+            candidate = f"{line} {word}" if line else word
+            if font.getlength(candidate) <= max_width or not line:
+                line = candidate
+            else:
+                lines.append(line)
+                line = word
+        lines.append(line)
+    return lines
+
+
+def _is_title(shape):
+    try:
+        return shape.is_placeholder and "TITLE" in str(shape.placeholder_format.type)
+    except Exception:
+        return False
+
+
+def _run_color(para, theme):
+    for r in para._p.findall("a:r", _NS):
+        color = _xml_fill(r.find("a:rPr", _NS), theme)
+        if color:
+            return color
+    return _xml_fill(para._p.find("a:pPr/a:defRPr", _NS), theme) or None
+
+
+def _run_font(para):
+    """
+    (size, bold) of the paragraph's first run, falling back to its default
+    run properties. Read from the XML: Font.size/.bold (and
+    _Paragraph.alignment) add rPr/pPr/defRPr elements when accessed.
+    """
+    size, bold = None, None
+    for rpr in (para._p.find("a:r/a:rPr", _NS), para._p.find("a:pPr/a:defRPr", _NS)):
+        if rpr is None:
+            continue
+        if size is None and rpr.get("sz"):
+            size = Pt(int(rpr.get("sz")) / 100)
+        if bold is None and rpr.get("b") is not None:
+            bold = rpr.get("b") in ("1", "true")
+    return size, bold
+
+
+def _draw_text_frame(draw, shape, box, scale, theme, backdrop):
+    tf = shape.text_frame
+    if not tf.text.strip():
+        return
+
+    x0, y0, x1, y1 = box
+    left = x0 + (tf.margin_left or 0) * scale
+    right = x1 - (tf.margin_right or 0) * scale
+    top = y0 + (tf.margin_top or 0) * scale
+    bottom = y1 - (tf.margin_bottom or 0) * scale
+    max_width = max(1, right - left)
+    title = _is_title(shape)
+    default_size = DEFAULT_TITLE_SIZE if title else DEFAULT_FONT_SIZE
+    default_color = _style_color(shape._element, "fontRef", theme) or _contrast_text(backdrop)
+
+    laid_out = []  # (text, font, color, align, line_height)
+    for para in tf.paragraphs:
+        text = "".join(r.text for r in para.runs) or para.text
+        size, bold = _run_font(para)
+        size = size or default_size
+        size_px = max(6, int(size * scale))
+        bold = bool(bold or title)
+        color = _run_color(para, theme) or default_color
+        ppr = para._p.find("a:pPr", _NS)
+        align = ppr.get("algn") if ppr is not None else None
+        font = _font(size_px, bold)
+        for line in _wrap(text, font, max_width):
+            laid_out.append((line, font, color, align, int(size_px * 1.2)))
+
+    total = sum(item[4] for item in laid_out)
+    anchor = tf.vertical_anchor
+    if anchor == MSO_ANCHOR.MIDDLE:
+        y = top + max(0, (bottom - top - total) / 2)
+    elif anchor == MSO_ANCHOR.BOTTOM:
+        y = max(top, bottom - total)
+    else:
+        y = top
+
+    for line, font, color, align, line_height in laid_out:
+        if y + line_height > bottom + line_height * 0.5:
+            break
+        width = font.getlength(line)
+        if align == "ctr":
+            x = left + (max_width - width) / 2
+        elif align == "r":
+            x = right - width
+        else:
+            x = left
+        draw.text((x, y), line, font=font, fill=color)
+        y += line_height
+
+
+def _draw_table(draw, shape, box, scale, theme, backdrop):
+    table = shape.table
+    col_widths = [c.width * scale for c in table.columns]
+    row_heights = [r.height * scale for r in table.rows]
+    font = _font(max(6, int(Pt(12) * scale)))
+    y = box[1]
+    for r, row in enumerate(table.rows):
+        x = box[0]
+        for c, cell in enumerate(row.cells):
+            cell_box = (x, y, x + col_widths[c], y + row_heights[r])
+            fill = _xml_fill(cell._tc.find("a:tcPr", _NS), theme) or None
+            draw.rectangle(cell_box, fill=fill, outline=(160, 160, 160), width=1)
+            text = cell.text.strip()
+            if text:
+                line = _wrap(text, font, max(1, col_widths[c] - 8))[0]
+                draw.text((cell_box[0] + 4, cell_box[1] + 2), line, font=font,
+                          fill=_contrast_text(fill or backdrop))
+            x += col_widths[c]
+        y += row_heights[r]
+
+
+# ------------------------------------------------------------
+# SHAPES
+# ------------------------------------------------------------
+def _draw_picture(canvas, shape, box):
+    x0, y0, x1, y1 = (int(round(v)) for v in box)
+    w, h = max(1, x1 - x0), max(1, y1 - y0)
+    try:
+        pic = _decoded(shape.image.blob, (w, h), "RGBA")
+        canvas.paste(pic, (x0, y0), pic)
+    except Exception:
+        # EMF/WMF and other formats Pillow cannot decode
+        ImageDraw.Draw(canvas).rectangle((x0, y0, x1, y1), fill=PLACEHOLDER_FILL)
+
+
+def _has_image(shape):
+    if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
+        return True
+    try:
+        return bool(shape.image)
+    except Exception:
+        return False
+
+
+def _draw_shape(canvas, draw, shape, transform, theme, background):
+    if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+        sub = transform.child(shape)
+        for child in shape.shapes:
+            _draw_shape(canvas, draw, child, sub, theme, background)
+        return
+
+    if hasattr(shape, "begin_x"):  # connector
+        start = transform.box(shape.begin_x, shape.begin_y, 0, 0)[:2]
+        end = transform.box(shape.end_x, shape.end_y, 0, 0)[:2]
+        color, line_px = _shape_line(shape, theme, transform.scale)
+        draw.line([start, end], fill=color or (90, 90, 90), width=line_px)
+        return
+
+    if None in (shape.left, shape.top, shape.width, shape.height):
+        return
+    box = transform.box(shape.left, shape.top, shape.width, shape.height)
+
+    if _has_image(shape):
+        _draw_picture(canvas, shape, box)
+        return
+
+    if getattr(shape, "has_table", False) and shape.has_table:
+        _draw_table(draw, shape, box, transform.scale, theme, background)
+        return
+
+    if getattr(shape, "has_chart", False) and shape.has_chart:
+        draw.rectangle(box, fill=PLACEHOLDER_FILL, outline=(180, 180, 180))
+        return
+
+    fill = _shape_fill(shape, theme, background)
+    outline, line_px = _shape_line(shape, theme, transform.scale)
+    if fill or outline:
+        _draw_geometry(draw, shape, box, fill, outline, line_px)
+
+    # Rotated text is skipped rather than drawn across the slide.
+    if getattr(shape, "has_text_frame", False) and shape.has_text_frame and not _rotated(shape):
+        crop = tuple(int(v) for v in box)
+        backdrop = fill or (_average_color(canvas.crop(crop)) if crop[2] > crop[0] and crop[3] > crop[1] else background)
+        _draw_text_frame(draw, shape, box, transform.scale, theme, backdrop)
+
+
+def _inherited_shapes(slide):
+    """Non-placeholder decoration from the master and layout, drawn under the slide."""
+    layout = slide.slide_layout
+    shapes = []
+    if slide._element.get("showMasterSp", "1") != "0":
+        if layout._element.get("showMasterSp", "1") != "0":
+            shapes.extend(s for s in layout.slide_master.shapes if not s.is_placeholder)
+        shapes.extend(s for s in layout.shapes if not s.is_placeholder)
+    return shapes
+
+
+def render_slide(prs, slide, width=RENDER_WIDTH, theme=None):
+    """Rasterize one slide of an open Presentation to a PIL image."""
+    scale = width / prs.slide_width
+    height = int(round(prs.slide_height * scale))
+    theme = theme if theme is not None else _load_theme_colors(prs)
+
+    canvas = Image.new("RGB", (width, height), (255, 255, 255))
+    background = _paint_background(canvas, slide, theme)
+    draw = ImageDraw.Draw(canvas)
+    transform = _Transform(scale)
+
+    for shape in _inherited_shapes(slide) + list(slide.shapes):
+        try:
+            _draw_shape(canvas, draw, shape, transform, theme, background)
+        except Exception:
+            logger.debug(f"Skipped shape '{getattr(shape, 'name', '?')}' while rendering")
+    return canvas
+
+
+def render_deck(ppt_path, indices=None, width=RENDER_WIDTH, fmt="PNG", content_key=None):
+    """
+    Render several slides with a single parse of the deck.
+    Slides already in the thumbnail cache are returned without parsing;
+    ``content_key`` (e.g. the blob ETag) defaults to a hash of the file.
+    Returns {slide_index: image_path}.
+    """
+    cache = get_thumbnail_cache()
+    content_key = content_key or deck_content_key(ppt_path)
+
+    def key(idx):
+        return ThumbnailCache.make_key(content_key, idx, width, None, fmt)
+
+    out = {}
+    if indices is not None:
+        for idx in indices:
+            path = cache.get(key(idx), fmt)
+            if path:
+                out[idx] = path
+        if len(out) == len(indices):
+            return out
+
+    prs = load_presentation(ppt_path)
+    theme = _load_theme_colors(prs)
+    slides = list(prs.slides)
+    if indices is None:
+        indices = range(len(slides))
+        for idx in indices:
+            path = cache.get(key(idx), fmt)
+            if path:
+                out[idx] = path
+
+    for idx in indices:
+        if idx in out:
+            continue
+        image = render_slide(prs, slides[idx], width=width, theme=theme)
+        # Thumbnails favour encode speed over file size.
+        save_kwargs = {"compress_level": 1} if fmt.upper() == "PNG" else {}
+        out[idx] = cache.put(key(idx), image, fmt, **save_kwargs)
+    logger.debug(f"Thumbnail cache: {cache.stats()}")
+    return out
+
+
+# ------------------------------------------------------------
+# PROCESS POOL
+# ------------------------------------------------------------
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned, not forked: the UI process is multi-threaded and holds
+            # sqlite connections, cache locks and the blob client pool.
+            _pool = ProcessPoolExecutor(
+                max_workers=max(1, RENDER_WORKERS),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def render_deck_async(ppt_path, indices=None, width=RENDER_WIDTH, fmt="PNG", content_key=None):
+    """Submit render_deck to the shared process pool; returns a Future."""
+    return _get_pool().submit(render_deck, ppt_path, indices, width, fmt, content_key)
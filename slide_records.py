@@ -0,0 +1,96 @@
+# slide_records.py
+from utils import logger, slide_record_id
+from collection_version import get_collection_version
+
+
+def slide_key(slide):
+    """(ppt_name, slide_index) for a slide struct from the catalog."""
+    return (slide.get("ppt_blob") or slide.get("ppt_name"), slide.get("slide_index"))
+
+
+def _where_pairs(pairs):
+    clauses = [
+        {"$and": [{"ppt_name": ppt_name}, {"slide_index": slide_index}]}
+        for ppt_name, slide_index in pairs
+    ]
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+def fetch_slide_records(collection, pairs):
+    """
+    Documents and metadata for many (ppt_name, slide_index) pairs.
+
+    One get() by deterministic id covers everything indexed since ids became
+    stable; rows still under legacy random ids are picked up by a single
+    metadata-filter query. Returns {(ppt_name, slide_index): record} where
+    record is {"document": str, "metadata": dict}; unknown slides are absent.
+    """
+    pairs = list(dict.fromkeys((p, int(i)) for p, i in pairs))
+    if not pairs:
+        return {}
+
+    records = {}
+    by_id = {slide_record_id(p, i): (p, i) for p, i in pairs}
+    res = collection.get(ids=list(by_id), include=["documents", "metadatas"])
+    for rid, doc, meta in zip(res.get("ids", []), res.get("documents", []), res.get("metadatas", [])):
+        records[by_id[rid]] = {"document": doc or "", "metadata": meta or {}}
+
+    missing = [p for p in pairs if p not in records]
+    if missing:
+        res = collection.get(where=_where_pairs(missing), include=["documents", "metadatas"])
+        for doc, meta in zip(res.get("documents", []), res.get("metadatas", [])):
+            meta = meta or {}
+            key = (meta.get("ppt_name"), meta.get("slide_index"))
+            if key in missing and key not in records:
+                records[key] = {"document": doc or "", "metadata": meta}
+
+    logger.info(f"Fetched {len(records)}/{len(pairs)} slide records from Chroma")
+    return records
+
+
+class SlideRecords:
+    """
+    Per-session memo of slide records. Missing pairs are fetched in one
+    batch; everything is dropped when the collection version changes.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.version = None
+        self._records = {}
+
+    def prefetch(self, slides):
+        version = get_collection_version()
+        if version != self.version:
+            self._records = {}
+            self.version = version
+
+        missing = [
+            k for k in map(slide_key, slides)
+            if k[0] is not None and k[1] is not None and k not in self._records
+        ]
+        if not missing:
+            return
+        try:
+            found = fetch_slide_records(self.collection, missing)
+        except Exception:
+            logger.exception("Failed to fetch slide records from Chroma")
+            return
+        for k in missing:
+            # Remember misses too, so a rerun does not query again.
+            self._records[k] = found.get((k[0], int(k[1])))
+
+    def get(self, slide):
+        """Memoized record; call prefetch() once per rerun to pick up version bumps."""
+        if slide_key(slide) not in self._records:
+            self.prefetch([slide])
+        return self._records.get(slide_key(slide))
+
+    def title(self, slide):
+        record = self.get(slide)
+        title = (record or {}).get("metadata", {}).get("title")
+        return title.strip() if title else None
+
+    def text(self, slide, max_chars=1200):
+        record = self.get(slide)
+        return (record or {}).get("document", "")[:max_chars]
@@ -1,13 +1,50 @@
 # slide_renderer.py
 import os
 import uuid
-import pythoncom
-import win32com.client
-from pptx import Presentation
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pptx.enum.shapes import MSO_SHAPE_TYPE
+from slide_rasterizer import render_deck, render_deck_async
+from deck_cache import load_presentation
+from utils import get_env
+
+# "raster" (default): headless python-pptx + Pillow renderer, works on Linux.
+# "com": PowerPoint automation, Windows + Office only.
+SLIDE_RENDERER = get_env("SLIDE_RENDERER", "raster").lower()
 
 
 def export_slide_to_png(ppt_path, slide_index):
+    if SLIDE_RENDERER == "com":
+        return _export_slide_via_com(ppt_path, slide_index)
+    return render_deck(ppt_path, [slide_index])[slide_index]
+
+
+def render_slides_async(ppt_path, indices):
+    """Future resolving to {slide_index: png_path}."""
+    if SLIDE_RENDERER == "com":
+        # PowerPoint automation is single-threaded; queue exports behind each other.
+        return _get_com_executor().submit(
+            lambda: {i: _export_slide_via_com(ppt_path, i) for i in indices}
+        )
+    return render_deck_async(ppt_path, list(indices))
+
+
+_com_executor = None
+_com_lock = threading.Lock()
+
+
+def _get_com_executor():
+    global _com_executor
+    with _com_lock:
+        if _com_executor is None:
+            _com_executor = ThreadPoolExecutor(max_workers=1)
+        return _com_executor
+
+
+def _export_slide_via_com(ppt_path, slide_index):
+    import pythoncom
+    import win32com.client
+
     pythoncom.CoInitialize()
     powerpoint = win32com.client.Dispatch("PowerPoint.Application")
     powerpoint.Visible = True
@@ -43,10 +80,7 @@ def _is_editable_text_shape(shape):
     return True
 
 
-def extract_slide_structure(ppt_path, slide_index):
-    prs = Presentation(ppt_path)
-    slide = prs.slides[slide_index]
-
+def _slide_editable_shapes(slide):
     editable_shapes = []
     idx = 0
 
@@ -89,11 +123,36 @@ def extract_slide_structure(ppt_path, slide_index):
                     })
                     idx += 1
 
-    png_path = export_slide_to_png(ppt_path, slide_index)
+    return editable_shapes
+
+
+def extract_deck_structure(ppt_path, indices=None, render=True):
+    """
+    Structures for several slides of one deck (all slides when ``indices`` is
+    None) from a single parse and a single render pass.
+    With ``render=False`` png_path is left as None (see render_slides_async).
+    """
+    prs = load_presentation(ppt_path)
+    slides = list(prs.slides)
+    indices = list(range(len(slides)) if indices is None else indices)
+
+    if not render:
+        png_paths = {}
+    elif SLIDE_RENDERER == "com":
+        png_paths = {i: _export_slide_via_com(ppt_path, i) for i in indices}
+    else:
+        png_paths = render_deck(ppt_path, indices)
+
+    return [
+        {
+            "slide_index": i,
+            "ppt_path": ppt_path,
+            "png_path": png_paths.get(i),
+            "editable_shapes": _slide_editable_shapes(slides[i])
+        }
+        for i in indices
+    ]
+
 
-    return {
-        "slide_index": slide_index,
-        "ppt_path": ppt_path,
-        "png_path": png_path,
-        "editable_shapes": editable_shapes
-    }
\ No newline at end of file
+def extract_slide_structure(ppt_path, slide_index):
+    return extract_deck_structure(ppt_path, [slide_index])[0]
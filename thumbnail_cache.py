@@ -0,0 +1,151 @@
+# thumbnail_cache.py
+import os
+import hashlib
+import tempfile
+import threading
+from utils import get_env, logger, ensure_dir
+
+THUMBNAIL_CACHE_DIR = get_env(
+    "THUMBNAIL_CACHE_DIR", os.path.join(tempfile.gettempdir(), "ppt_thumbnails")
+)
+THUMBNAIL_CACHE_MAX_BYTES = int(get_env("THUMBNAIL_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+_hash_memo = {}
+_hash_lock = threading.Lock()
+
+
+def deck_content_key(ppt_path):
+    """
+    Content hash of a local deck, memoized on (path, mtime, size) so repeat
+    lookups do not re-read the file.
+    """
+    st = os.stat(ppt_path)
+    memo_key = (os.path.abspath(ppt_path), st.st_mtime_ns, st.st_size)
+    with _hash_lock:
+        cached = _hash_memo.get(memo_key)
+    if cached:
+        return cached
+
+    h = hashlib.sha256()
+    with open(ppt_path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(1024 * 1024), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _hash_lock:
+        _hash_memo[memo_key] = digest
+    return digest
+
+
+class ThumbnailCache:
+    """
+    Rendered thumbnails in a managed directory, keyed by
+    (content key, slide index, width, height, format).
+
+    File mtimes double as LRU timestamps: hits touch the file, and when the
+    directory grows past ``max_bytes`` the oldest files are deleted.
+    """
+
+    def __init__(self, directory=THUMBNAIL_CACHE_DIR, max_bytes=THUMBNAIL_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max(1, max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        ensure_dir(directory)
+        self._bytes = sum(size for _, size, _ in self._entries())
+
+    @staticmethod
+    def make_key(content_key, slide_index, width, height, fmt):
+        raw = f"{content_key}|{slide_index}|{width}|{height or 'auto'}|{fmt.lower()}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key, fmt):
+        return os.path.join(self.directory, f"{key}.{fmt.lower()}")
+
+    def _entries(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".tmp"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            yield path, st.st_size, st.st_mtime
+
+    def get(self, key, fmt="PNG"):
+        """Path of the cached thumbnail, or None."""
+        path = self._path(key, fmt)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def put(self, key, image, fmt="PNG", **save_kwargs):
+        """Store a PIL image atomically and return its path."""
+        path = self._path(key, fmt)
+        # Unique per call: render pool processes can share a thread ident.
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                image.save(fp, format=fmt, **save_kwargs)
+            size = os.path.getsize(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+        with self._lock:
+            self._bytes += size
+            over = self._bytes > self.max_bytes
+        if over:
+            self._evict()
+        return path
+
+    def _evict(self):
+        target = int(self.max_bytes * 0.9)
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except FileNotFoundError:
+                continue
+        with self._lock:
+            self._bytes = total
+        logger.info(f"Thumbnail cache evicted {removed} files; {total} bytes in use")
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "bytes_used": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_thumbnail_cache():
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ThumbnailCache()
+        return _default_cache
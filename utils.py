@@ -1,7 +1,11 @@
 from openai import AzureOpenAI
 import os
+import re
 import json
 import logging
+import uuid
+import sqlite3
+from io import BytesIO
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -44,6 +48,63 @@ def now_ts():
     return datetime.utcnow().isoformat() + "Z"
 
 
+def slide_record_id(ppt_name, slide_index):
+    """Stable Chroma id for a slide, so re-indexing a deck overwrites its rows."""
+    return f"{ppt_name}::slide::{int(slide_index):04d}"
+
+
+def tag_field(tag):
+    """Boolean metadata key for a tag, e.g. "Claims" -> "tag_claims"."""
+    return "tag_" + re.sub(r"[^a-z0-9]+", "_", str(tag).strip().lower()).strip("_")
+
+
+def tag_where(tags, mode="any"):
+    """
+    Chroma ``where`` clause matching slides with any (OR) or all (AND)
+    of ``tags``, evaluated inside the vector query. None when no tags.
+    """
+    if mode not in ("any", "all"):
+        raise ValueError(f"Unsupported tag mode: {mode}")
+    clauses = [{tag_field(t): True} for t in dict.fromkeys(tags or []) if str(t).strip()]
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$or" if mode == "any" else "$and": clauses}
+
+
+PPTX_MIME = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+
+def presentation_buffer(prs, save_to=None, prefix="ppt"):
+    """
+    Serialize a Presentation into a BytesIO (rewound). Nothing touches disk
+    unless ``save_to`` is given: a file path, or True for
+    ``generated/<prefix>_<uuid6>.pptx``. The saved path is set as ``buf.name``.
+    """
+    buf = BytesIO()
+    prs.save(buf)
+    if save_to:
+        path = save_to if isinstance(save_to, (str, os.PathLike)) else \
+            os.path.join("generated", f"{prefix}_{uuid.uuid4().hex[:6]}.pptx")
+        ensure_dir(os.path.dirname(os.path.abspath(path)))
+        with open(path, "wb") as fp:
+            fp.write(buf.getbuffer())
+        buf.name = str(path)
+    buf.seek(0)
+    return buf
+
+
+def retry_after_seconds(exc):
+    """Retry-After hint (seconds) from an OpenAI/HTTP error, or None."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
 def get_embedding_dim(model_name):
     try:
         return int(get_env("EMBEDDING_DIM", 1536))
@@ -67,4 +128,20 @@ image_client = AzureOpenAI(
     azure_endpoint = get_env("IMAGE_API_BASE", required=True),
     api_key        = get_env("IMAGE_API_KEY", required=True),
     api_version    = get_env("OPENAI_API_VERSION", required=True)
-)
\ No newline at end of file
+)
+
+
+# -----------------------------
+#  LOCAL SQLITE STORES (manifest, caches)
+# -----------------------------
+def open_sqlite(path):
+    """
+    Open a SQLite database for a local store shared between threads.
+    WAL lets readers proceed while a writer commits.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    ensure_dir(parent)
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn